@@ -1,28 +1,21 @@
+import io
 import os
-import subprocess
+import time
+import uuid
+
+from utils.calentamiento import calentar
+
+# Una vez por proceso y antes de importar los módulos, para que la primera sesión no pague el arranque
+tiempos_calentamiento = calentar()
 
 import streamlit as st
 from modules.cartera import mostrar_modulo_cartera
 from modules.jubilacion import mostrar_modulo_jubilacion
 from modules.bonos import mostrar_modulo_bonos
-from utils.exportar import generar_pdf_reporte
-
-def install_chrome():
-    try:
-        subprocess.run(["google-chrome", "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        print("✅ Chrome ya está instalado")
-    except:
-        print("⬇️ Instalando Google Chrome...")
-        subprocess.run([
-            "apt-get", "update"
-        ], check=True)
-        subprocess.run([
-            "apt-get", "install", "-y", "google-chrome-stable"
-        ], check=True)
-        print("✅ Chrome instalado correctamente")
-
-install_chrome()
-
+from utils.exportar import generar_pdf_reporte, grafico_cartera, grafico_jubilacion, grafico_bono
+from utils import perfilado
+from utils.presets import PRESETS, ESCENARIO_INICIO, catalogo
+from utils.exportar_tablas import bloques_dataframe, escribir_csv, escribir_xlsx
 
 st.set_page_config(
     page_title="Calculadora Financiera",
@@ -61,6 +54,18 @@ with st.sidebar:
         label_visibility="collapsed"
     )
     
+    st.markdown("---")
+    if st.checkbox("📉 Ver montos en términos reales", help="Descuenta la inflación de proyecciones, pensiones y flujos"):
+        st.session_state['modo_real'] = st.number_input(
+            "Inflación anual (%)",
+            min_value=0.0,
+            max_value=50.0,
+            value=3.0,
+            step=0.5
+        )
+    else:
+        st.session_state['modo_real'] = None
+    
     st.markdown("---")
     st.markdown("### 📚 Guía Rápida")
     st.write("""
@@ -70,6 +75,16 @@ with st.sidebar:
     4. **Exportar**: Descarga reporte
     """)
     
+    st.markdown("---")
+    if 'perfilado_sesion' not in st.session_state:
+        st.session_state['perfilado_sesion'] = uuid.uuid4().hex
+    perfilado.activar(st.checkbox(
+        "⏱️ Mostrar tiempos por etapa",
+        value=perfilado.ACTIVO_POR_DEFECTO,
+        help="Mide cálculo, tablas, gráficas y PDF en cada ejecución"
+    ), sesion=st.session_state['perfilado_sesion'])
+    inicio_ejecucion = time.time()
+    
     st.markdown("---")
     st.caption("Desarrollado para Finanzas Corporativas")
     st.caption("© 2024 - Todos los derechos reservados")
@@ -131,28 +146,39 @@ if pagina == "🏠 Inicio":
     st.markdown("---")
     st.subheader("🚀 Ejemplo Rápido")
     
+    resumen, cronogramas, _ = catalogo()
+    ejemplo = PRESETS[ESCENARIO_INICIO]
+    resultado = resumen.loc[ESCENARIO_INICIO]
+    
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
+        st.markdown(f"""
         **Escenario de ejemplo:**
         - Edad actual: 30 años
-        - Inversión inicial: $5,000
-        - Aporte mensual: $500
-        - TEA esperada: 8%
-        - Edad de jubilación: 65 años
+        - Inversión inicial: ${ejemplo['monto_inicial']:,.0f}
+        - Aporte mensual: ${ejemplo['aporte_periodico']:,.0f}
+        - TEA esperada: {ejemplo['tea']:g}%
+        - Edad de jubilación: {30 + ejemplo['anos']} años
+        - Retiro: {ejemplo['anos_retiro']} años al {ejemplo['tea_retiro']:g}% (impuesto de fuente extranjera)
         """)
     
     with col2:
-        st.markdown("""
-        **Resultado esperado:**
-        - Plazo: 35 años
-        - Total aportado: ~$215,000
-        - Capital acumulado: ~$1,100,000
-        - Pensión mensual: ~$8,500/mes
+        st.markdown(f"""
+        **Resultado:**
+        - Plazo: {ejemplo['anos']} años
+        - Total aportado: ${resultado['Total Aportes']:,.2f}
+        - Capital acumulado: ${resultado['Saldo Final']:,.2f}
+        - Capital neto de impuestos: ${resultado['Capital Neto']:,.2f}
+        - Pensión mensual: ${resultado['Pensión Mensual']:,.2f}/mes
         """)
     
-    st.success("💡 ¡Estos resultados son aproximados! Usa los módulos para cálculos exactos.")
+    st.area_chart(cronogramas[ESCENARIO_INICIO].set_index('Periodo')['Saldo'], height=220)
+    
+    with st.expander("📋 Escenarios frecuentes"):
+        st.dataframe(resumen.style.format({c: "${:,.2f}" for c in resumen.columns[1:]}),
+                     use_container_width=True, hide_index=True)
+        st.caption("Elige cualquiera de estos escenarios en el Módulo Cartera para cargar sus datos")
 
 elif pagina == "📊 Cartera":
     mostrar_modulo_cartera()
@@ -204,7 +230,7 @@ elif pagina == "📄 Exportar":
                 datos_jubilacion = None
                 datos_bono = None
                 
-                if 'cartera_saldo_final' in st.session_state or 'cartera_grafico' in st.session_state:
+                if 'cartera_saldo_final' in st.session_state:
                     datos_cartera = {
                         'monto_inicial': st.session_state['cartera_params']['monto_inicial'],
                         'aporte_periodico': st.session_state['cartera_params']['aporte_periodico'],
@@ -212,14 +238,14 @@ elif pagina == "📄 Exportar":
                         'anos': st.session_state['cartera_params']['anos'],
                         'saldo_final': st.session_state['cartera_saldo_final']
                     }
-                if 'cartera_grafico' in st.session_state:
-                        datos_cartera['grafico'] = st.session_state['cartera_grafico']
+                    datos_cartera['grafico'] = grafico_cartera(st.session_state['cartera_df'])
                 
                 if 'jubilacion_data' in st.session_state:
-                    datos_jubilacion = st.session_state['jubilacion_data']
-                if 'jubilacion_grafico' in st.session_state:
-                     if datos_jubilacion is not None:
-                        datos_jubilacion['grafico'] = st.session_state['jubilacion_grafico']
+                    datos_jubilacion = dict(st.session_state['jubilacion_data'])
+                    if datos_jubilacion['opcion_retiro'] == "Pensión Mensual" and 'jubilacion_df' in st.session_state:
+                        datos_jubilacion['grafico'] = grafico_jubilacion(
+                            st.session_state['jubilacion_df'], datos_jubilacion['capital_neto']
+                        )
                 
                 if 'bono_vp' in st.session_state:
                     datos_bono = {
@@ -228,8 +254,7 @@ elif pagina == "📄 Exportar":
                         'anos': st.session_state['bono_params']['anos'],
                         'vp_total': st.session_state['bono_vp']
                     }
-                if 'bono_grafico' in st.session_state:
-                    datos_bono['grafico'] = st.session_state['bono_grafico']
+                    datos_bono['grafico'] = grafico_bono(st.session_state['bono_df'])
                         
                 pdf_buffer = generar_pdf_reporte(datos_cartera, datos_jubilacion, datos_bono)
                 
@@ -242,6 +267,78 @@ elif pagina == "📄 Exportar":
                 )
                 
                 st.success("✅ Reporte generado exitosamente")
+        
+        st.markdown("---")
+        st.subheader("📊 Exportar Cronogramas")
+        
+        tablas = {}
+        if 'cartera_df' in st.session_state:
+            tablas['Cartera'] = st.session_state['cartera_df']
+        if st.session_state.get('jubilacion_data', {}).get('opcion_retiro') == "Pensión Mensual" \
+                and 'jubilacion_df' in st.session_state:
+            tablas['Jubilación'] = st.session_state['jubilacion_df']
+        if 'bono_df' in st.session_state:
+            tablas['Bono'] = st.session_state['bono_df']
+        
+        if tablas:
+            st.write(f"**Cronogramas disponibles:** {', '.join(tablas)}")
+            formato = st.radio("Formato", ["Excel (XLSX)", "CSV"], horizontal=True)
+            
+            if st.button("📥 Generar Cronogramas", use_container_width=True):
+                with st.spinner("Generando archivos..."):
+                    if formato == "CSV":
+                        for nombre, df in tablas.items():
+                            buffer = io.BytesIO()
+                            escribir_csv(buffer, bloques_dataframe(df))
+                            st.download_button(
+                                label=f"📄 Descargar {nombre} (CSV)",
+                                data=buffer.getvalue(),
+                                file_name=f"cronograma_{nombre.lower().replace('ó', 'o')}.csv",
+                                mime="text/csv",
+                                use_container_width=True
+                            )
+                    else:
+                        buffer = io.BytesIO()
+                        try:
+                            escribir_xlsx(buffer, {nombre: bloques_dataframe(df) for nombre, df in tablas.items()})
+                        except ImportError as e:
+                            st.error(f"❌ {e}")
+                        else:
+                            st.download_button(
+                                label="📗 Descargar Cronogramas (XLSX)",
+                                data=buffer.getvalue(),
+                                file_name="cronogramas.xlsx",
+                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                use_container_width=True
+                            )
+        else:
+            st.info("💡 Calcula la cartera, una pensión mensual o un bono para exportar sus cronogramas")
     else:
         st.error("❌ No hay datos para exportar. Por favor, completa al menos un módulo.")
-        st.info("💡 Ve a los módulos de Cartera, Jubilación o Bonos para generar datos")
\ No newline at end of file
+        st.info("💡 Ve a los módulos de Cartera, Jubilación o Bonos para generar datos")
+
+if perfilado.esta_activo():
+    with st.sidebar:
+        with st.expander("⏱️ Tiempos por etapa", expanded=True):
+            tramos = perfilado.tramos_recientes(inicio_ejecucion, solo_sesion_actual=True)
+            if tramos:
+                st.dataframe(
+                    [{'Etapa': t['etapa'], 'ms': t['duracion_ms']} for t in tramos],
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.caption("Sin etapas medidas en esta ejecución")
+            
+            if tiempos_calentamiento:
+                st.caption(f"🔥 Calentamiento del proceso: {tiempos_calentamiento['total']:,.0f} ms "
+                           f"(importar {tiempos_calentamiento['importar']:,.0f} ms, "
+                           f"reporte {tiempos_calentamiento['reporte']:,.0f} ms)")
+                for etapa, error in tiempos_calentamiento['errores'].items():
+                    st.caption(f"⚠️ Calentamiento, etapa {etapa}: {error}")
+            
+            if st.button("💾 Exportar tramos (JSONL)", use_container_width=True):
+                cantidad, st.session_state['perfilado_exportado'] = perfilado.exportar_jsonl(
+                    desde=st.session_state.get('perfilado_exportado', 0)
+                )
+                st.success(f"✅ {cantidad} tramos guardados en perfilado.jsonl")
\ No newline at end of file
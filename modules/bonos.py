@@ -1,11 +1,16 @@
 import streamlit as st
 import plotly.graph_objects as go
-from utils.calculos import calcular_valor_bono
+from utils.calculos import calcular_valor_bono, valorar_bono_a_fecha, PERIODOS_ANUALES, PILARES_CURVA
+from utils.fechas import CONVENCIONES, sumar_meses, cupones_vecinos
+from utils.inflacion import deflactores
 from utils.validaciones import validar_monto, validar_tea, validar_anos
-import io
+from utils.perfilado import cronometrar, medir
+from utils.bonos_lote import COLUMNAS_BONO, leer_bonos_por_bloques, valorar_libro_bonos
 import base64
+from datetime import date
 
 
+@cronometrar()
 def mostrar_modulo_bonos():
     st.header("📈 Módulo C: Proyeccion de Bonos")
     st.markdown("---")
@@ -49,6 +54,26 @@ def mostrar_modulo_bonos():
             index=5,
             help="Con qué frecuencia el bono paga cupones"
         )
+        
+        etiquetas_tipo = {
+            'bullet': "Bullet (principal al vencimiento)",
+            'amortizable': "Amortizable (cuotas iguales de principal)",
+            'flotante': "Flotante (forward + spread)"
+        }
+        tipo = st.selectbox(
+            "Estructura del Bono",
+            list(etiquetas_tipo),
+            format_func=lambda x: etiquetas_tipo[x],
+            help="En los flotantes la tasa cupón se usa como spread sobre la curva forward"
+        )
+        
+        tasas_forward = None
+        if tipo == 'flotante':
+            tasas_forward = leer_curva(st.text_input(
+                "Curva Forward (% TEA por año)",
+                value="5, 5.5, 6",
+                help="Una tasa por año separada por comas; la última se repite hasta el vencimiento"
+            ))
     
     with col2:
         st.subheader("⚙️ Condiciones del Mercado")
@@ -85,9 +110,12 @@ def mostrar_modulo_bonos():
                    validar_tea(tea_mercado),
                    validar_anos(anos, "Plazo")]):
             return
+        if tipo == 'flotante' and not tasas_forward:
+            st.error("❌ Ingresa una curva forward válida (números separados por comas)")
+            return
         
         df_flujos, vp_total = calcular_valor_bono(
-            valor_nominal, tasa_cupon, frecuencia_pago, anos, tea_mercado
+            valor_nominal, tasa_cupon, frecuencia_pago, anos, tea_mercado, tipo, tasas_forward
         )
         
         st.session_state['bono_df'] = df_flujos
@@ -97,7 +125,9 @@ def mostrar_modulo_bonos():
             'tasa_cupon': tasa_cupon,
             'frecuencia_pago': frecuencia_pago,
             'anos': anos,
-            'tea_mercado': tea_mercado
+            'tea_mercado': tea_mercado,
+            'tipo': tipo,
+            'tasas_forward': tasas_forward
         }
         
         st.success("✅ Valoración completada exitosamente")
@@ -131,46 +161,79 @@ def mostrar_modulo_bonos():
         
         df = st.session_state['bono_df']
         
-        fig = go.Figure()
+        inflacion = st.session_state.get('modo_real')
+        if inflacion is not None:
+            deflactor = deflactores(inflacion, len(df), PERIODOS_ANUALES[params['frecuencia_pago']])
+            df = df.assign(**{'Flujo Real': (df['Flujo'] * deflactor).round(2)})
+            st.caption(f"📉 'Flujo Real' expresa cada flujo en dólares de hoy (inflación {inflacion}% anual)")
         
-        fig.add_trace(go.Bar(
-            x=df['Periodo'],
-            y=df['Flujo'],
-            name='Flujo de Caja',
-            marker_color='lightblue',
-            text=df['Flujo'].apply(lambda x: f"${x:,.0f}"),
-            textposition='outside'
-        ))
+        with medir('modules.bonos.grafico'):
+            fig = go.Figure()
         
-        fig.add_trace(go.Scatter(
-            x=df['Periodo'],
-            y=df['VP Flujo'],
-            name='VP de Flujo',
-            mode='lines+markers',
-            line=dict(color='red', width=2),
-            marker=dict(size=8)
-        ))
+            fig.add_trace(go.Bar(
+                x=df['Periodo'],
+                y=df['Flujo'],
+                name='Flujo de Caja',
+                marker_color='lightblue',
+                text=df['Flujo'].apply(lambda x: f"${x:,.0f}"),
+                textposition='outside'
+            ))
         
-        fig.update_layout(
-            title='Flujos de Caja y Valor Presente',
-            xaxis_title='Periodo',
-            yaxis_title='Monto (USD)',
-            template='plotly_white',
-            hovermode='x unified'
-        )
+            fig.add_trace(go.Scatter(
+                x=df['Periodo'],
+                y=df['VP Flujo'],
+                name='VP de Flujo',
+                mode='lines+markers',
+                line=dict(color='red', width=2),
+                marker=dict(size=8)
+            ))
+        
+            fig.update_layout(
+                title='Flujos de Caja y Valor Presente',
+                xaxis_title='Periodo',
+                yaxis_title='Monto (USD)',
+                template='plotly_white',
+                hovermode='x unified'
+            )
 
         
         
         st.plotly_chart(fig, use_container_width=True)
-        img_bytes = io.BytesIO()
-        fig.write_image(img_bytes, format="png")
-        img_bytes.seek(0)
-        st.session_state['bono_grafico'] = img_bytes.getvalue()
         
         with st.expander("📋 Ver Tabla Detallada de Flujos"):
             st.dataframe(df, use_container_width=True, hide_index=True)
             st.write(f"**Valor Presente Total: ${vp:,.2f}**")
         
+        with st.expander("📅 Valoración a Fecha de Liquidación"):
+            col_f1, col_f2, col_f3 = st.columns(3)
+            fecha_emision = col_f1.date_input("Fecha de Emisión", value=date.today())
+            fecha_liquidacion = col_f2.date_input("Fecha de Liquidación", value=date.today())
+            convencion = col_f3.selectbox("Conteo de Días", CONVENCIONES)
+            
+            periodos_anuales = PERIODOS_ANUALES[params['frecuencia_pago']]
+            vencimiento = sumar_meses(fecha_emision, params['anos'] * 12)
+            
+            if not (fecha_emision <= fecha_liquidacion < vencimiento.item()):
+                st.warning(f"⚠️ La liquidación debe estar entre la emisión y el vencimiento ({vencimiento.item():%d/%m/%Y})")
+            else:
+                nominal_vigente = params['valor_nominal']
+                if params.get('tipo') == 'amortizable':
+                    _, _, restantes = cupones_vecinos(fecha_liquidacion, vencimiento, periodos_anuales)
+                    nominal_vigente = params['valor_nominal'] * restantes / (params['anos'] * periodos_anuales)
+                
+                valoracion = valorar_bono_a_fecha(
+                    fecha_liquidacion, vencimiento, nominal_vigente, params['tasa_cupon'], periodos_anuales,
+                    params['tea_mercado'], convencion, params.get('tipo', 'bullet'), params.get('tasas_forward')
+                )
+                
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Precio Limpio", f"${valoracion['precio_limpio'][0]:,.2f}")
+                col2.metric("Interés Corrido", f"${valoracion['interes_corrido'][0]:,.2f}")
+                col3.metric("Precio Sucio", f"${valoracion['precio_sucio'][0]:,.2f}")
+                st.caption(f"Cupón anterior: {valoracion['cupon_anterior'][0]} · "
+                           f"Próximo cupón: {valoracion['proximo_cupon'][0]} · "
+                           f"Cupones restantes: {valoracion['cupones_restantes'][0]}")
+        
         with st.expander("📈 Análisis de Sensibilidad"):
             st.subheader("Valor del Bono según TEA de Mercado")
             
@@ -183,7 +246,9 @@ def mostrar_modulo_bonos():
                     params['tasa_cupon'],
                     params['frecuencia_pago'],
                     params['anos'],
-                    tasa
+                    tasa,
+                    params.get('tipo', 'bullet'),
+                    params.get('tasas_forward')
                 )
                 valores.append(vp_temp)
             
@@ -214,4 +279,97 @@ def mostrar_modulo_bonos():
             st.plotly_chart(fig_sens, use_container_width=True)
             
             st.info("💡 A mayor tasa de mercado, menor es el valor presente del bono")
-    
\ No newline at end of file
+    
+    st.markdown("---")
+    mostrar_valoracion_lote()
+
+
+FILAS_POR_PAGINA = 50
+
+def leer_curva(texto):
+    """Convierte '5, 5.5, 6' en [5.0, 5.5, 6.0]; devuelve None si el texto no es válido"""
+    try:
+        curva = [float(x) for x in texto.replace(';', ',').split(',') if x.strip()]
+    except ValueError:
+        return None
+    return curva or None
+
+def mostrar_valoracion_lote():
+    st.subheader("📂 Valoración Masiva de Bonos")
+    
+    with st.expander("ℹ️ Formato del archivo"):
+        st.write(f"""
+        Sube un archivo CSV o Parquet con una fila por bono y las columnas:
+        `{'`, `'.join(COLUMNAS_BONO)}` y opcionalmente `id` y `tipo`
+        (bullet, amortizable o flotante).
+        
+        La frecuencia debe ser una de: Mensual, Bimestral, Trimestral, Cuatrimestral, Semestral o Anual.
+        Las filas que no cumplan las validaciones se omiten y se listan aparte.
+        """)
+    
+    archivo = st.file_uploader("Libro de bonos", type=["csv", "parquet"])
+    curva_lote = leer_curva(st.text_input(
+        "Curva Forward para bonos flotantes (% TEA por año)",
+        value="",
+        help="Solo se usa si el archivo trae bonos de tipo flotante"
+    ))
+    pilares = None
+    if st.checkbox("📐 Calcular duraciones por tasa clave",
+                   help="Sube y baja 1 pb cada pilar de la curva y revalora todo el libro"):
+        pilares = leer_curva(st.text_input(
+            "Pilares de la curva (años)",
+            value=", ".join(f"{p:g}" for p in PILARES_CURVA)
+        ))
+        if pilares is None or sorted(set(pilares)) != pilares:
+            st.error("❌ Ingresa los pilares en años, en orden creciente y sin repetir")
+            return
+    
+    if archivo is not None and st.button("📊 Valorar Libro de Bonos", use_container_width=True):
+        with st.spinner("Valorando bonos..."):
+            try:
+                resultados, errores, resumen = valorar_libro_bonos(
+                    leer_bonos_por_bloques(archivo, archivo.name), curva_lote, pilares
+                )
+            except (ValueError, ImportError) as e:
+                st.error(f"❌ {e}")
+                return
+        
+        st.session_state['bonos_lote'] = {
+            'resultados': resultados,
+            'errores': errores,
+            'resumen': resumen,
+            'pilares': pilares
+        }
+        st.success("✅ Libro de bonos valorado")
+    
+    if 'bonos_lote' in st.session_state:
+        lote = st.session_state['bonos_lote']
+        resumen = lote['resumen']
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Bonos Válidos", f"{resumen['validos']:,}", delta=f"-{resumen['invalidos']:,} inválidos",
+                    delta_color="off")
+        col2.metric("Valor Nominal del Libro", f"${resumen['valor_nominal']:,.2f}")
+        col3.metric("Valor Presente del Libro", f"${resumen['valor_presente']:,.2f}")
+        
+        if lote.get('pilares') is not None and resumen['valor_presente'] > 0:
+            dv01 = resumen['dv01_pilares']
+            duracion = dv01.sum() * 10_000 / resumen['valor_presente']
+            st.metric("Duración Efectiva del Libro", f"{duracion:,.2f} años",
+                      help="Suma de las duraciones por tasa clave ponderadas por valor presente")
+            st.dataframe([{'Pilar (años)': p, 'DV01 (USD por pb)': round(v, 2),
+                           'KRD del Libro': round(v * 10_000 / resumen['valor_presente'], 4)}
+                          for p, v in zip(lote['pilares'], dv01)],
+                         use_container_width=True, hide_index=True)
+        
+        resultados = lote['resultados']
+        if len(resultados) > 0:
+            paginas = (len(resultados) - 1) // FILAS_POR_PAGINA + 1
+            pagina = st.number_input(f"Página (de {paginas:,})", min_value=1, max_value=paginas, value=1)
+            inicio = (pagina - 1) * FILAS_POR_PAGINA
+            st.dataframe(resultados.iloc[inicio:inicio + FILAS_POR_PAGINA],
+                         use_container_width=True, hide_index=True)
+        
+        if len(lote['errores']) > 0:
+            with st.expander(f"⚠️ Filas inválidas ({resumen['invalidos']:,})"):
+                st.dataframe(lote['errores'], use_container_width=True, hide_index=True)
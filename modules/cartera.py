@@ -1,9 +1,19 @@
 import streamlit as st
 import plotly.graph_objects as go
-from utils.calculos import calcular_crecimiento_cartera
+from utils.incremental import EvaluadorCartera, verificar_contra_recalculo
 from utils.validaciones import validar_monto, validar_tea, validar_anos
-import io
+from utils import perfilado
+from utils.perfilado import cronometrar, medir
+from utils.calculos import (PERIODOS_ANUALES, calcular_cartera_consolidada, calcular_crecimiento_cartera,
+                            calcular_crecimiento_cartera_neto)
+from utils.validaciones_lote import validar_tabla, primer_error, mensaje
+import numpy as np
+import pandas as pd
+from utils.inflacion import deflactores, expresar_en_reales, aportes_reales
+from utils.presets import PRESETS, buscar_preset, resultado_cartera
+from utils.dinero import calcular_crecimiento_cartera_exacto
 
+@cronometrar()
 def mostrar_modulo_cartera():
     st.header("📊 Módulo A: Crecimiento de Cartera")
     st.markdown("---")
@@ -17,6 +27,14 @@ def mostrar_modulo_cartera():
         - **Plazo**: Años que mantendrás la inversión
         """)
     
+    preset = st.selectbox(
+        "Escenario predefinido",
+        ["personalizado"] + list(PRESETS),
+        format_func=lambda x: "Personalizado" if x == "personalizado" else PRESETS[x]['nombre'],
+        help="Carga los datos de un escenario frecuente; sus resultados ya están calculados"
+    )
+    valores = PRESETS.get(preset, PRESETS['moderado'])
+    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -25,7 +43,7 @@ def mostrar_modulo_cartera():
         monto_inicial = st.number_input(
             "Monto Inicial (USD)",
             min_value=0.0,
-            value=1000.0,
+            value=valores['monto_inicial'],
             step=100.0,
             help="Capital inicial que vas a invertir"
         )
@@ -33,7 +51,7 @@ def mostrar_modulo_cartera():
         aporte_periodico = st.number_input(
             "Aporte Periódico (USD)",
             min_value=0.0,
-            value=100.0,
+            value=valores['aporte_periodico'],
             step=50.0,
             help="Cantidad que aportarás en cada periodo"
         )
@@ -41,6 +59,7 @@ def mostrar_modulo_cartera():
         frecuencia = st.selectbox(
             "Frecuencia de Aportes",
             ["Mensual", "Trimestral", "Semestral", "Anual"],
+            index=["Mensual", "Trimestral", "Semestral", "Anual"].index(valores['frecuencia']),
             help="Con qué frecuencia realizarás los aportes"
         )
     
@@ -51,7 +70,7 @@ def mostrar_modulo_cartera():
             "TEA - Tasa Efectiva Anual (%)",
             min_value=0.0,
             max_value=50.0,
-            value=8.0,
+            value=valores['tea'],
             step=0.5,
             help="Rentabilidad anual esperada"
         )
@@ -66,7 +85,7 @@ def mostrar_modulo_cartera():
                 "Plazo (años)",
                 min_value=1,
                 max_value=80,
-                value=30,
+                value=valores['anos'],
                 help="Años que mantendrás la inversión"
             )
         else:
@@ -77,6 +96,26 @@ def mostrar_modulo_cartera():
                 edad_jubilacion = st.number_input("Edad Jubilación", min_value=18, max_value=100, value=65)
             anos = edad_jubilacion - edad_actual
             st.info(f"Plazo calculado: {anos} años")
+        
+        centavos_exactos = st.checkbox(
+            "🧾 Centavos exactos (modo contable)",
+            help="Redondea el interés al centavo en cada periodo, como el estado de cuenta"
+        )
+        
+        etiquetas_retencion = {
+            "ninguna": "Sin retención (impuesto al final)",
+            "local": "Bolsa Local (5%)",
+            "extranjera": "Fuente Extranjera (29.5%)"
+        }
+        retencion = st.selectbox(
+            "Retención de Impuesto por Periodo",
+            ["ninguna", "local", "extranjera"],
+            format_func=lambda x: etiquetas_retencion[x],
+            help="Retiene el impuesto sobre el interés de cada periodo según el tramo alcanzado"
+        )
+        if centavos_exactos and retencion != "ninguna":
+            st.info("ℹ️ Con retención por periodo no se aplica el modo de centavos exactos")
+            centavos_exactos = False
     
     st.markdown("---")
     
@@ -91,9 +130,36 @@ def mostrar_modulo_cartera():
         periodos_anuales = frecuencias[frecuencia]
         periodos_totales = anos * periodos_anuales
         
-        df, saldo_final, total_aportes = calcular_crecimiento_cartera(
-            monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales
-        )
+        clave_preset = buscar_preset(monto_inicial, aporte_periodico, tea, frecuencia, anos)
+        impuesto_retenido = None
+        if retencion != "ninguna":
+            df, saldo_final, total_aportes, impuesto_retenido = calcular_crecimiento_cartera_neto(
+                monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales, {retencion: 1.0}
+            )
+        elif centavos_exactos:
+            df, saldo_final, total_aportes = calcular_crecimiento_cartera_exacto(
+                monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales
+            )
+        elif clave_preset is not None:
+            df, saldo_final, total_aportes = resultado_cartera(clave_preset)
+        else:
+            if 'cartera_evaluador' not in st.session_state:
+                st.session_state['cartera_evaluador'] = EvaluadorCartera()
+            
+            df, saldo_final, total_aportes = st.session_state['cartera_evaluador'].calcular(
+                monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales
+            )
+            
+            # Con la medición de tiempos activa también se comprueba la caché contra el recálculo completo
+            if perfilado.esta_activo() and not verificar_contra_recalculo(
+                st.session_state['cartera_evaluador'], monto_inicial, aporte_periodico, tea,
+                periodos_totales, periodos_anuales
+            ):
+                st.warning("⚠️ El cálculo incremental no coincide con el recálculo completo; se usa el recálculo")
+                st.session_state['cartera_evaluador'] = EvaluadorCartera()
+                df, saldo_final, total_aportes = calcular_crecimiento_cartera(
+                    monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales
+                )
         
         st.session_state['cartera_df'] = df
         st.session_state['cartera_saldo_final'] = saldo_final
@@ -103,56 +169,150 @@ def mostrar_modulo_cartera():
             'aporte_periodico': aporte_periodico,
             'tea': tea,
             'anos': anos,
-            'frecuencia': frecuencia
+            'frecuencia': frecuencia,
+            'centavos_exactos': centavos_exactos,
+            'impuesto_retenido': impuesto_retenido
         }
         
         st.success("✅ Cálculo completado exitosamente")
     
+    mostrar_cuentas_multiples(anos)
+    
     if 'cartera_saldo_final' in st.session_state:
         st.markdown("---")
         st.subheader("📈 Resultados")
         
-        ganancia = st.session_state['cartera_saldo_final'] - st.session_state['cartera_total_aportes']
+        df = st.session_state['cartera_df']
+        saldo_final = st.session_state['cartera_saldo_final']
+        total_aportes = st.session_state['cartera_total_aportes']
+        
+        inflacion = st.session_state.get('modo_real')
+        if inflacion is not None:
+            periodos_anuales = PERIODOS_ANUALES[st.session_state['cartera_params']['frecuencia']]
+            deflactor = deflactores(inflacion, len(df), periodos_anuales)
+            columnas = [c for c in ['Aporte', 'Interés', 'Retención', 'Saldo'] if c in df.columns]
+            # Cada aporte vale lo del periodo en que se hizo, no lo del final del plazo
+            total_real = aportes_reales(st.session_state['cartera_params']['monto_inicial'], df['Aporte'], deflactor)
+            df = expresar_en_reales(df, columnas, deflactor)
+            df['Total Aportes'] = np.round(total_real, 2)
+            if len(deflactor) > 0:
+                saldo_final = saldo_final * deflactor[-1]
+                total_aportes = float(total_real[-1])
+            st.caption(f"📉 Montos en dólares de hoy (inflación {inflacion}% anual)")
+        
+        ganancia = saldo_final - total_aportes
         
         col1, col2, col3 = st.columns(3)
-        col1.metric("Total Aportado", f"${st.session_state['cartera_total_aportes']:,.2f}")
+        col1.metric("Total Aportado", f"${total_aportes:,.2f}")
         col2.metric("Ganancia", f"${ganancia:,.2f}")
-        col3.metric("Saldo Final", f"${st.session_state['cartera_saldo_final']:,.2f}")
+        col3.metric("Saldo Final", f"${saldo_final:,.2f}")
+        if 'Retención' in df.columns:
+            st.caption(f"🧾 Impuesto retenido en el camino: ${df['Retención'].sum():,.2f}; "
+                       "la ganancia y el saldo ya son netos")
         
         st.subheader("📊 Gráfica de Crecimiento")
         
-        df = st.session_state['cartera_df']
         
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=df['Periodo'],
-            y=df['Total Aportes'],
-            mode='lines',
-            name='Aportes Acumulados',
-            line=dict(color='#636EFA', width=2)
-        ))
-        fig.add_trace(go.Scatter(
-            x=df['Periodo'],
-            y=df['Saldo'],
-            mode='lines',
-            name='Saldo Total',
-            line=dict(color='#00CC96', width=3),
-            fill='tonexty'
-        ))
-        
-        fig.update_layout(
-            title='Evolución de la Inversión',
-            xaxis_title='Periodo',
-            yaxis_title='Monto (USD)',
-            hovermode='x unified',
-            template='plotly_white'
-        )
+        with medir('modules.cartera.grafico'):
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=df['Periodo'],
+                y=df['Total Aportes'],
+                mode='lines',
+                name='Aportes Acumulados',
+                line=dict(color='#636EFA', width=2)
+            ))
+            fig.add_trace(go.Scatter(
+                x=df['Periodo'],
+                y=df['Saldo'],
+                mode='lines',
+                name='Saldo Total',
+                line=dict(color='#00CC96', width=3),
+                fill='tonexty'
+            ))
+        
+            fig.update_layout(
+                title='Evolución de la Inversión',
+                xaxis_title='Periodo',
+                yaxis_title='Monto (USD)',
+                hovermode='x unified',
+                template='plotly_white'
+            )
         
         st.plotly_chart(fig, use_container_width=True)
-        img_bytes = io.BytesIO()
-        fig.write_image(img_bytes, format="png")
-        img_bytes.seek(0)
-        st.session_state['cartera_grafico'] = img_bytes.getvalue()
         
         with st.expander("📋 Ver Tabla Detallada"):
-            st.dataframe(df, use_container_width=True, hide_index=True)
\ No newline at end of file
+            st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+CUENTAS_EJEMPLO = pd.DataFrame({
+    'Cuenta': ["Cuenta 1", "Cuenta 2"],
+    'Monto Inicial': [1000.0, 5000.0],
+    'Aporte': [100.0, 300.0],
+    'Frecuencia': ["Mensual", "Trimestral"],
+    'TEA (%)': [8.0, 6.0]
+})
+
+def mostrar_cuentas_multiples(anos):
+    with st.expander("👥 Proyectar Varias Cuentas"):
+        st.write("""
+        Agrega una fila por cuenta. Todas se proyectan con el plazo indicado arriba
+        sobre una línea de tiempo mensual y se suman en un solo saldo, que luego
+        puedes usar en el Módulo de Jubilación.
+        """)
+        
+        cuentas = st.data_editor(
+            st.session_state.get('cartera_cuentas', CUENTAS_EJEMPLO),
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Frecuencia': st.column_config.SelectboxColumn(
+                    options=["Mensual", "Trimestral", "Semestral", "Anual"], required=True
+                )
+            }
+        )
+        
+        if st.button("👥 Proyectar Cuentas", use_container_width=True):
+            if not validar_anos(anos):
+                return
+            
+            cuentas = cuentas.dropna(how='all')
+            if len(cuentas) == 0:
+                st.error("❌ Agrega al menos una cuenta")
+                return
+            
+            valido, codigos = validar_tabla(cuentas, {'Monto Inicial': 'monto', 'Aporte': 'monto', 'TEA (%)': 'tea'})
+            invalidas = ~(valido & cuentas['Frecuencia'].isin(PERIODOS_ANUALES.keys()).to_numpy())
+            if invalidas.any():
+                fila = int(invalidas.argmax())
+                columna, codigo = primer_error(codigos)
+                detalle = mensaje(codigo[fila], columna[fila]) if codigo[fila] else "La frecuencia no es válida"
+                st.error(f"❌ Revisa la fila {fila + 1}: {detalle}")
+                return
+            
+            periodos_anuales = cuentas['Frecuencia'].map(PERIODOS_ANUALES).to_numpy(dtype=float)
+            df, saldo_final, total_aportes = calcular_cartera_consolidada(
+                cuentas['Monto Inicial'].to_numpy(dtype=float),
+                cuentas['Aporte'].to_numpy(dtype=float),
+                cuentas['TEA (%)'].to_numpy(dtype=float),
+                periodos_anuales,
+                anos
+            )
+            
+            monto_inicial = float(cuentas['Monto Inicial'].sum())
+            st.session_state['cartera_cuentas'] = cuentas
+            st.session_state['cartera_df'] = df
+            st.session_state['cartera_saldo_final'] = saldo_final
+            st.session_state['cartera_total_aportes'] = total_aportes
+            st.session_state['cartera_params'] = {
+                'monto_inicial': monto_inicial,
+                'aporte_periodico': float((cuentas['Aporte'] * periodos_anuales / 12).sum()),
+                'tea': float((cuentas['TEA (%)'] * cuentas['Monto Inicial']).sum() / monto_inicial)
+                       if monto_inicial > 0 else float(cuentas['TEA (%)'].mean()),
+                'anos': anos,
+                'frecuencia': "Mensual",
+                'cuentas': len(cuentas)
+            }
+            
+            st.success(f"✅ {len(cuentas)} cuentas proyectadas; el saldo combinado ya está disponible para Jubilación")
\ No newline at end of file
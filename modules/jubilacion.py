@@ -1,9 +1,11 @@
 import streamlit as st
 import plotly.graph_objects as go
-from utils.calculos import calcular_pension_mensual, calcular_impuesto
+from utils.calculos import calcular_pension_mensual, calcular_impuesto, calcular_cronograma_retiro
+from utils.perfilado import cronometrar, medir
+from utils.inflacion import deflactores, expresar_en_reales
 import plotly.io as pio
-import io
 
+@cronometrar()
 def mostrar_modulo_jubilacion():
     st.header("💰 Módulo B: Proyección de Jubilación")
     st.markdown("---")
@@ -52,13 +54,33 @@ def mostrar_modulo_jubilacion():
             total_aportes = st.session_state['cartera_total_aportes']
             st.info(f"💰 Capital del Módulo A: ${capital_acumulado:,.2f}")
             st.info(f"📊 Total Aportado: ${total_aportes:,.2f}")
+        impuesto_retenido = None if usar_manual else st.session_state['cartera_params'].get('impuesto_retenido')
+        if impuesto_retenido is not None:
+            st.info(f"🧾 El Módulo A ya retuvo ${impuesto_retenido:,.2f} de impuesto; no se cobra otra vez")
         
+        etiquetas_impuesto = {
+            "extranjera": "Fuente Extranjera (29.5%)",
+            "local": "Bolsa Local (5%)",
+            "mixta": "Mixta (Local + Extranjera)"
+        }
         tipo_impuesto = st.selectbox(
             "Tipo de Inversión",
-            ["extranjera", "local"],
-            format_func=lambda x: "Fuente Extranjera (29.5%)" if x == "extranjera" else "Bolsa Local (5%)",
+            ["extranjera", "local", "mixta"],
+            format_func=lambda x: etiquetas_impuesto[x],
             help="Selecciona el tipo de inversión para calcular impuestos"
         )
+        
+        if tipo_impuesto == "mixta":
+            porcentaje_local = st.slider(
+                "Porcentaje en Bolsa Local (%)",
+                min_value=0,
+                max_value=100,
+                value=50,
+                help="Parte de la cartera invertida en bolsa local; el resto es fuente extranjera"
+            )
+            asignacion = {'local': porcentaje_local / 100, 'extranjera': 1 - porcentaje_local / 100}
+        else:
+            asignacion = {tipo_impuesto: 1.0}
     
     with col2:
         st.subheader("⚙️ Parámetros de Retiro")
@@ -86,9 +108,19 @@ def mostrar_modulo_jubilacion():
                 step=0.5,
                 help="Rentabilidad esperada durante la jubilación"
             )
+            
+            inflacion_retiro = st.number_input(
+                "Indexación por Inflación (% anual)",
+                min_value=0.0,
+                max_value=50.0,
+                value=0.0,
+                step=0.5,
+                help="La pensión crece cada mes a esta tasa anual para mantener su poder de compra"
+            )
         else:
             anos_retiro = None
             tea_retiro = None
+            inflacion_retiro = None
     
     st.markdown("---")
     
@@ -99,11 +131,11 @@ def mostrar_modulo_jubilacion():
             st.error("❌ El capital acumulado no puede ser menor que el total aportado")
             return
         
-        impuesto = calcular_impuesto(ganancia, tipo_impuesto)
+        impuesto = 0.0 if impuesto_retenido is not None else calcular_impuesto(ganancia, asignacion)
         capital_neto = capital_acumulado - impuesto
         
         if opcion_retiro == "Pensión Mensual":
-            pension_mensual = calcular_pension_mensual(capital_neto, tea_retiro, anos_retiro)
+            pension_mensual = calcular_pension_mensual(capital_neto, tea_retiro, anos_retiro, inflacion_retiro)
         else:
             pension_mensual = 0
         
@@ -115,9 +147,12 @@ def mostrar_modulo_jubilacion():
             'capital_neto': capital_neto,
             'pension_mensual': pension_mensual,
             'tipo_impuesto': tipo_impuesto,
+            'asignacion': asignacion,
             'opcion_retiro': opcion_retiro,
             'anos_retiro': anos_retiro,
-            'tea_retiro': tea_retiro
+            'tea_retiro': tea_retiro,
+            'inflacion_retiro': inflacion_retiro,
+            'capital_manual': usar_manual
         }
         
         st.success("✅ Cálculo de jubilación completado")
@@ -137,41 +172,63 @@ def mostrar_modulo_jubilacion():
             st.markdown("---")
             st.success(f"### 💵 Pensión Mensual: ${data['pension_mensual']:,.2f}")
             st.info(f"Recibirás esta pensión durante {data['anos_retiro']} años ({data['anos_retiro'] * 12} meses)")
+            if data.get('inflacion_retiro'):
+                st.info(f"La pensión se indexa al {data['inflacion_retiro']:.2f}% anual; el monto indicado es el primer retiro")
             
-            fig = go.Figure()
+            df_retiro = calcular_cronograma_retiro(
+                data['capital_neto'], data['tea_retiro'], data['anos_retiro'], data.get('inflacion_retiro') or 0
+            )
+            st.session_state['jubilacion_df'] = df_retiro
             
-            meses = list(range(1, data['anos_retiro'] * 12 + 1))
-            pension_acumulada = [data['pension_mensual'] * i for i in meses]
+            inflacion = st.session_state.get('modo_real')
+            if inflacion is not None:
+                # El retiro empieza al terminar el plazo de la cartera (si viene del Módulo A)
+                meses_previos = 0 if data.get('capital_manual', True) else st.session_state['cartera_params']['anos'] * 12
+                deflactor = deflactores(inflacion, len(df_retiro), 12, meses_previos)
+                df_retiro = expresar_en_reales(df_retiro, ['Retiro', 'Interés', 'Saldo'], deflactor)
+                # El acumulado suma cada retiro en dólares de hoy de su propio mes
+                df_retiro['Retiro Acumulado'] = df_retiro['Retiro'].cumsum().round(2)
+                st.caption(f"📉 Cronograma en dólares de hoy (inflación {inflacion}% anual). "
+                           f"Primer retiro real: ${df_retiro['Retiro'].iloc[0]:,.2f}")
             
-            fig.add_trace(go.Scatter(
-                x=meses,
-                y=pension_acumulada,
-                mode='lines',
-                name='Pensión Acumulada',
-                line=dict(color='#00CC96', width=3),
-                fill='tozeroy'
-            ))
+            with medir('modules.jubilacion.grafico'):
+                fig = go.Figure()
             
-            fig.add_hline(
-                y=data['capital_neto'],
-                line_dash="dash",
-                line_color="red",
-                annotation_text=f"Capital Inicial: ${data['capital_neto']:,.0f}"
-            )
+                fig.add_trace(go.Scatter(
+                    x=df_retiro['Mes'],
+                    y=df_retiro['Retiro Acumulado'],
+                    mode='lines',
+                    name='Pensión Acumulada',
+                    line=dict(color='#00CC96', width=3),
+                    fill='tozeroy'
+                ))
+                
+                fig.add_trace(go.Scatter(
+                    x=df_retiro['Mes'],
+                    y=df_retiro['Saldo'],
+                    mode='lines',
+                    name='Saldo Restante',
+                    line=dict(color='#636EFA', width=2)
+                ))
             
-            fig.update_layout(
-                title='Proyección de Retiro Mensual',
-                xaxis_title='Mes',
-                yaxis_title='Monto Acumulado (USD)',
-                template='plotly_white'
-            )
+                fig.add_hline(
+                    y=data['capital_neto'],
+                    line_dash="dash",
+                    line_color="red",
+                    annotation_text=f"Capital Inicial: ${data['capital_neto']:,.0f}"
+                )
+            
+                fig.update_layout(
+                    title='Proyección de Retiro Mensual',
+                    xaxis_title='Mes',
+                    yaxis_title='Monto (USD)',
+                    template='plotly_white'
+                )
             
             st.plotly_chart(fig, use_container_width=True)
-            img_bytes = io.BytesIO()
-            fig.write_image(img_bytes, format="png")
-            img_bytes.seek(0)
-            st.session_state['jubilacion_grafico'] = img_bytes.getvalue()
-            st.write("Debug:", len(st.session_state['jubilacion_grafico']))
+            
+            with st.expander("📋 Ver Cronograma de Retiro"):
+                st.dataframe(df_retiro, use_container_width=True, hide_index=True)
 
 
         else:
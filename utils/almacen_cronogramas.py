@@ -0,0 +1,130 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+TAMANO_ENCABEZADO = 128
+
+def _encabezado_npy(filas):
+    """Encabezado .npy de tamaño fijo para poder reescribirlo al cerrar"""
+    dic = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d,), }" % filas
+    relleno = TAMANO_ENCABEZADO - 10 - len(dic) - 1
+    return b'\x93NUMPY\x01\x00' + (TAMANO_ENCABEZADO - 10).to_bytes(2, 'little') + \
+        (dic + ' ' * relleno + '\n').encode('latin1')
+
+class EscritorCronogramas:
+    """Escribe cronogramas de muchos clientes en columnas float64 (.npy) de forma incremental
+
+    Cada columna es un archivo .npy que se va llenando al final, así que
+    la memoria usada no depende del número de clientes. Al cerrar se
+    fija la forma de cada archivo y se guarda el índice de clientes.
+    """
+    
+    def __init__(self, directorio, columnas):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.columnas = list(columnas)
+        self._archivos = {}
+        for columna in self.columnas:
+            archivo = open(os.path.join(directorio, f'{columna}.npy'), 'wb')
+            archivo.write(_encabezado_npy(0))
+            self._archivos[columna] = archivo
+        self._clientes = []
+        self._inicios = []
+        self._largos = []
+        self._filas = 0
+    
+    def agregar(self, cliente, **columnas):
+        """Agrega el cronograma de un cliente; todas las columnas deben tener el mismo largo"""
+        largos = {len(valores) for valores in columnas.values()}
+        if set(columnas) != set(self.columnas) or len(largos) != 1:
+            raise ValueError(f"Se esperan las columnas {self.columnas} con el mismo largo")
+        largo = largos.pop()
+        for columna in self.columnas:
+            self._archivos[columna].write(np.ascontiguousarray(columnas[columna], dtype='<f8').tobytes())
+        self._clientes.append(cliente)
+        self._inicios.append(self._filas)
+        self._largos.append(largo)
+        self._filas += largo
+    
+    def cerrar(self):
+        for archivo in self._archivos.values():
+            archivo.seek(0)
+            archivo.write(_encabezado_npy(self._filas))
+            archivo.close()
+        np.save(os.path.join(self.directorio, '_indice.npy'),
+                np.column_stack((np.asarray(self._inicios, dtype=np.int64),
+                                 np.asarray(self._largos, dtype=np.int64))).reshape(-1, 2))
+        with open(os.path.join(self.directorio, '_meta.json'), 'w', encoding='utf-8') as archivo:
+            json.dump({'columnas': self.columnas, 'clientes': [str(c) for c in self._clientes]},
+                      archivo, ensure_ascii=False)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+class LectorCronogramas:
+    """Lee cronogramas escritos por EscritorCronogramas sin cargarlos completos en memoria"""
+    
+    def __init__(self, directorio):
+        with open(os.path.join(directorio, '_meta.json'), encoding='utf-8') as archivo:
+            meta = json.load(archivo)
+        self.columnas = meta['columnas']
+        self.clientes = meta['clientes']
+        self._posicion = {cliente: i for i, cliente in enumerate(self.clientes)}
+        self._indice = np.load(os.path.join(directorio, '_indice.npy'))
+        self._datos = {
+            columna: np.load(os.path.join(directorio, f'{columna}.npy'), mmap_mode='r')
+            for columna in self.columnas
+        }
+    
+    def __len__(self):
+        return len(self.clientes)
+    
+    def columnas_cliente(self, cliente):
+        """Devuelve vistas de solo lectura sobre las columnas del cliente (sin copiar)"""
+        inicio, largo = self._indice[self._posicion[str(cliente)]]
+        return {columna: datos[inicio:inicio + largo] for columna, datos in self._datos.items()}
+    
+    def cronograma(self, cliente):
+        """Devuelve el cronograma del cliente como DataFrame"""
+        return pd.DataFrame(self.columnas_cliente(cliente), copy=False)
+    
+    def recorrer(self, filas_por_bloque=50_000):
+        """Recorre todos los cronogramas en bloques de filas con una columna 'Cliente'
+
+        Los clientes están guardados uno tras otro, así que cada bloque es
+        un corte de las columnas; la memoria no depende del total de filas.
+        """
+        inicios = self._indice[:, 0] if len(self._indice) else np.empty(0, dtype=np.int64)
+        clientes = np.asarray(self.clientes, dtype=object)
+        total = int(self._indice[:, 1].sum()) if len(self._indice) else 0
+        for inicio in range(0, total, filas_por_bloque):
+            filas = np.arange(inicio, min(inicio + filas_por_bloque, total))
+            bloque = {'Cliente': clientes[np.searchsorted(inicios, filas, side='right') - 1]}
+            bloque.update({columna: datos[filas[0]:filas[-1] + 1] for columna, datos in self._datos.items()})
+            yield pd.DataFrame(bloque, copy=False)
+
+def escribir_cronogramas_cartera(directorio, clientes):
+    """Escribe el cronograma de cartera de cada cliente
+
+    clientes es un iterable de (id, monto_inicial, aporte_periodico, tea,
+    periodos_totales, periodos_anuales).
+    """
+    from utils.calculos import tasa_equivalente, saldos_cartera
+    
+    with EscritorCronogramas(directorio, ['Periodo', 'Interés', 'Saldo', 'Total Aportes']) as escritor:
+        for cliente, monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales in clientes:
+            tasa = tasa_equivalente(tea, periodos_anuales)
+            periodos, saldo_previo, saldo = saldos_cartera(monto_inicial, aporte_periodico, tasa, periodos_totales)
+            escritor.agregar(
+                cliente,
+                **{'Periodo': periodos,
+                   'Interés': saldo_previo * tasa,
+                   'Saldo': saldo,
+                   'Total Aportes': monto_inicial + aporte_periodico * periodos}
+            )
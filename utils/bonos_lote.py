@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+from utils.calculos import (PERIODOS_ANUALES, TIPOS_BONO, valorar_bonos_lote, valorar_bonos_estructurados,
+                            duraciones_tasa_clave)
+from utils.validaciones_lote import codigos_catalogo, validar_tabla, primer_error, mensaje
+from utils.perfilado import cronometrar
+
+COLUMNAS_BONO = ['valor_nominal', 'tasa_cupon', 'frecuencia_pago', 'anos', 'tea_mercado']
+COLUMNAS_OPCIONALES = ['id', 'tipo']
+TAMANO_BLOQUE = 100_000
+MAX_ERRORES_GUARDADOS = 1000
+
+def leer_bonos_por_bloques(archivo, nombre_archivo, tamano_bloque=TAMANO_BLOQUE):
+    """Lee un CSV o Parquet de bonos en bloques de DataFrames"""
+    if nombre_archivo.lower().endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Para leer archivos Parquet instala pyarrow: pip install pyarrow")
+        
+        parquet = pq.ParquetFile(archivo)
+        columnas = [c for c in parquet.schema_arrow.names if c in COLUMNAS_BONO + COLUMNAS_OPCIONALES]
+        for lote in parquet.iter_batches(batch_size=tamano_bloque, columns=columnas):
+            yield lote.to_pandas()
+    else:
+        lector = pd.read_csv(
+            archivo,
+            chunksize=tamano_bloque,
+            usecols=lambda c: c in COLUMNAS_BONO + COLUMNAS_OPCIONALES,
+            dtype={'frecuencia_pago': 'category', 'tipo': 'category'}
+        )
+        for bloque in lector:
+            yield bloque
+
+REGLAS_BONO = {
+    'valor_nominal': 'monto',
+    'tasa_cupon': 'tea',
+    'frecuencia_pago': lambda v: codigos_catalogo(v.astype(str), PERIODOS_ANUALES.keys()),
+    'anos': 'anos_entero',
+    'tea_mercado': 'tea',
+}
+
+NOMBRES_COLUMNA = {
+    'valor_nominal': 'Valor nominal',
+    'tasa_cupon': 'Tasa cupón',
+    'frecuencia_pago': 'Frecuencia de pago',
+    'anos': 'Plazo',
+    'tea_mercado': 'TEA de mercado',
+    'tipo': 'Tipo de bono',
+}
+
+def validar_bloque_bonos(bloque, tipos_permitidos=TIPOS_BONO):
+    """Devuelve la máscara de filas válidas, la columna y el código del primer error"""
+    faltantes = [c for c in COLUMNAS_BONO if c not in bloque.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+    
+    reglas = dict(REGLAS_BONO)
+    if 'tipo' in bloque.columns:
+        reglas['tipo'] = lambda v: codigos_catalogo(v.astype(str), tipos_permitidos)
+    valido, codigos = validar_tabla(bloque, reglas)
+    columna, codigo = primer_error(codigos)
+    return valido, columna, codigo
+
+@cronometrar()
+def valorar_libro_bonos(bloques, tasas_forward=None, pilares=None):
+    """Valida y valora por bloques un libro de bonos, acumulando totales
+
+    Si el archivo trae la columna 'tipo', cada bono se valora según su
+    estructura (bullet, amortizable o flotante); los flotantes usan la
+    curva tasas_forward y se marcan inválidos si no se indica. Con
+    pilares se agregan las duraciones por tasa clave de cada bono y el
+    DV01 del libro por pilar (dólares por punto básico).
+    """
+    tipos_permitidos = [t for t in TIPOS_BONO if t != 'flotante' or tasas_forward]
+    resultados = []
+    errores = []
+    resumen = {'bonos': 0, 'validos': 0, 'invalidos': 0, 'valor_nominal': 0.0, 'valor_presente': 0.0}
+    if pilares is not None:
+        resumen['dv01_pilares'] = np.zeros(len(pilares))
+    fila_inicial = 0
+    errores_guardados = 0
+    
+    for bloque in bloques:
+        valido, columna, codigo = validar_bloque_bonos(bloque, tipos_permitidos)
+        filas = np.arange(fila_inicial, fila_inicial + len(bloque))
+        fila_inicial += len(bloque)
+        
+        if errores_guardados < MAX_ERRORES_GUARDADOS and not valido.all():
+            errores.append(pd.DataFrame({
+                'Fila': filas[~valido] + 1,
+                'Columna': columna[~valido],
+                'Código': codigo[~valido]
+            }))
+            errores_guardados += int((~valido).sum())
+        
+        bonos = bloque[valido]
+        nominal = bonos['valor_nominal'].to_numpy(dtype=float)
+        parametros = (
+            nominal,
+            bonos['tasa_cupon'].to_numpy(dtype=float),
+            bonos['frecuencia_pago'].astype(str).map(PERIODOS_ANUALES).to_numpy(dtype=float),
+            bonos['anos'].to_numpy(dtype=float),
+            bonos['tea_mercado'].to_numpy(dtype=float)
+        )
+        tipos = bonos['tipo'].astype(str).to_numpy() if 'tipo' in bonos.columns else None
+        if pilares is not None:
+            vp, krd = duraciones_tasa_clave('bullet' if tipos is None else tipos, *parametros,
+                                            pilares=pilares, tasas_forward=tasas_forward)
+        elif tipos is None or (tipos == 'bullet').all():
+            vp = valorar_bonos_lote(*parametros)
+        else:
+            vp = valorar_bonos_estructurados(tipos, *parametros, tasas_forward=tasas_forward)
+        
+        resultado = pd.DataFrame({
+            'Bono': bonos['id'].to_numpy() if 'id' in bonos.columns else filas[valido] + 1,
+            'Valor Nominal': nominal,
+            'Valor Presente': np.round(vp, 2),
+            'Diferencia (%)': np.round(np.where(nominal > 0, (vp / np.where(nominal > 0, nominal, 1) - 1) * 100, 0), 2)
+        })
+        if pilares is not None:
+            for i, pilar in enumerate(pilares):
+                resultado[f'KRD {pilar:g}a'] = np.round(krd[:, i], 4)
+            resumen['dv01_pilares'] += (vp[:, None] * krd).sum(axis=0) / 10_000
+        resultados.append(resultado)
+        
+        resumen['bonos'] += len(bloque)
+        resumen['validos'] += int(valido.sum())
+        resumen['invalidos'] += int((~valido).sum())
+        resumen['valor_nominal'] += float(nominal.sum())
+        resumen['valor_presente'] += float(vp.sum())
+    
+    df_resultados = pd.concat(resultados, ignore_index=True) if resultados else pd.DataFrame()
+    if errores:
+        df_errores = pd.concat(errores, ignore_index=True).head(MAX_ERRORES_GUARDADOS)
+        df_errores['Motivo'] = [mensaje(c, NOMBRES_COLUMNA[col])
+                                for col, c in zip(df_errores['Columna'], df_errores['Código'])]
+    else:
+        df_errores = pd.DataFrame(columns=['Fila', 'Columna', 'Código', 'Motivo'])
+    return df_resultados, df_errores, resumen
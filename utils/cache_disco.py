@@ -0,0 +1,184 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+RUTA_CACHE = os.environ.get(
+    'CALC_CACHE_RUTA',
+    os.path.join(os.path.expanduser('~'), '.cache', 'calculadora_financiera', 'resultados.sqlite')
+)
+CACHE_ACTIVO = os.environ.get('CALC_CACHE', '0') == '1'
+TAMANO_MAXIMO = int(os.environ.get('CALC_CACHE_MB', '256')) * 1024 * 1024
+TTL_SEGUNDOS = int(os.environ.get('CALC_CACHE_TTL', str(7 * 24 * 3600)))
+REFRESCO_USO = 60
+# Formato de lo guardado; subirlo invalida todas las entradas. Cada función tiene además
+# su propia versión (cache_en_disco(version=...)) que se sube cuando cambia lo que devuelve
+VERSION_ESQUEMA = 1
+
+_local = threading.local()
+
+def _conexion():
+    """Una conexión por hilo; SQLite en modo WAL admite varios procesos a la vez"""
+    conexion = getattr(_local, 'conexion', None)
+    if conexion is None:
+        os.makedirs(os.path.dirname(RUTA_CACHE), exist_ok=True)
+        conexion = sqlite3.connect(RUTA_CACHE, timeout=5, isolation_level=None)
+        conexion.execute('PRAGMA journal_mode=WAL')
+        conexion.execute('PRAGMA synchronous=NORMAL')
+        conexion.execute('''CREATE TABLE IF NOT EXISTS resultados (
+            clave TEXT PRIMARY KEY,
+            funcion TEXT NOT NULL,
+            datos BLOB NOT NULL,
+            tamano INTEGER NOT NULL,
+            creado REAL NOT NULL,
+            usado REAL NOT NULL
+        )''')
+        conexion.execute('CREATE INDEX IF NOT EXISTS idx_usado ON resultados (usado)')
+        _local.conexion = conexion
+    return conexion
+
+def _canonico(valor):
+    """Convierte un argumento en un valor JSON estable para armar la clave"""
+    if isinstance(valor, np.ndarray):
+        return {'arreglo': hashlib.sha256(np.ascontiguousarray(valor).tobytes()).hexdigest(),
+                'forma': valor.shape, 'tipo': str(valor.dtype)}
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, dict):
+        return {str(k): _canonico(v) for k, v in sorted(valor.items())}
+    if isinstance(valor, (list, tuple)):
+        return [_canonico(v) for v in valor]
+    # 1000 y 1000.0 dan claves distintas: el tipo del argumento define el de las columnas del resultado
+    return valor
+
+def clave_cache(funcion, args, kwargs, version=1):
+    """Hash canónico de la función, su versión y sus argumentos"""
+    texto = json.dumps([VERSION_ESQUEMA, funcion, version, _canonico(list(args)), _canonico(kwargs)],
+                       sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+def _serializar(resultado):
+    """Guarda el resultado como columnas binarias contiguas precedidas por un encabezado JSON"""
+    elementos = resultado if isinstance(resultado, tuple) else (resultado,)
+    encabezado = {'tupla': isinstance(resultado, tuple), 'columnas': []}
+    bloques = []
+    desplazamiento = 0
+    for i, elemento in enumerate(elementos):
+        if isinstance(elemento, pd.DataFrame):
+            columnas = [(str(c), elemento[c].to_numpy()) for c in elemento.columns]
+            encabezado['columnas'].append({'elemento': i, 'df': True, 'nombre': None})
+        else:
+            columnas = [(None, np.asarray(elemento))]
+        for nombre, arreglo in columnas:
+            if arreglo.dtype == object:
+                raise TypeError("Solo se guardan columnas numéricas")
+            crudo = np.ascontiguousarray(arreglo).tobytes()
+            encabezado['columnas'].append({
+                'elemento': i, 'df': nombre is not None, 'nombre': nombre,
+                'tipo': arreglo.dtype.str, 'forma': arreglo.shape, 'desde': desplazamiento
+            })
+            bloques.append(crudo)
+            desplazamiento += len(crudo)
+    cabecera = json.dumps(encabezado).encode('utf-8')
+    return len(cabecera).to_bytes(4, 'little') + cabecera + b''.join(bloques)
+
+def _deserializar(datos):
+    largo = int.from_bytes(datos[:4], 'little')
+    encabezado = json.loads(datos[4:4 + largo])
+    cuerpo = memoryview(datos)[4 + largo:]
+    elementos = {}
+    for columna in encabezado['columnas']:
+        i = columna['elemento']
+        if 'tipo' not in columna:
+            elementos[i] = {}
+            continue
+        tipo = np.dtype(columna['tipo'])
+        cantidad = int(np.prod(columna['forma']))
+        arreglo = np.frombuffer(cuerpo, dtype=tipo, count=cantidad,
+                                offset=columna['desde']).reshape(columna['forma'])
+        if columna['df']:
+            elementos[i][columna['nombre']] = arreglo
+        else:
+            elementos[i] = arreglo.item() if arreglo.ndim == 0 else arreglo
+    resultado = [pd.DataFrame(e) if isinstance(e, dict) else e for _, e in sorted(elementos.items())]
+    return tuple(resultado) if encabezado['tupla'] else resultado[0]
+
+def leer(clave):
+    conexion = _conexion()
+    fila = conexion.execute('SELECT datos, creado, usado FROM resultados WHERE clave = ?', (clave,)).fetchone()
+    if fila is None:
+        return None
+    ahora = time.time()
+    if ahora - fila[1] > TTL_SEGUNDOS:
+        conexion.execute('DELETE FROM resultados WHERE clave = ?', (clave,))
+        return None
+    if ahora - fila[2] > REFRESCO_USO:
+        # Se evita escribir en cada lectura; basta una marca aproximada para el LRU
+        conexion.execute('UPDATE resultados SET usado = ? WHERE clave = ?', (ahora, clave))
+    return _deserializar(fila[0])
+
+def guardar(clave, funcion, resultado):
+    datos = _serializar(resultado)
+    ahora = time.time()
+    conexion = _conexion()
+    conexion.execute('BEGIN IMMEDIATE')
+    try:
+        conexion.execute(
+            'INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?, ?)',
+            (clave, funcion, datos, len(datos), ahora, ahora)
+        )
+        _desalojar(conexion, ahora)
+        conexion.execute('COMMIT')
+    except BaseException:
+        conexion.execute('ROLLBACK')
+        raise
+
+def _desalojar(conexion, ahora):
+    """Elimina lo vencido y luego lo menos usado hasta respetar el tamaño máximo"""
+    conexion.execute('DELETE FROM resultados WHERE creado < ?', (ahora - TTL_SEGUNDOS,))
+    conexion.execute('''DELETE FROM resultados WHERE clave IN (
+        SELECT clave FROM (
+            SELECT clave, SUM(tamano) OVER (ORDER BY usado DESC) AS acumulado FROM resultados
+        ) WHERE acumulado > ?
+    )''', (TAMANO_MAXIMO,))
+
+def limpiar():
+    _conexion().execute('DELETE FROM resultados')
+
+def cache_en_disco(funcion=None, version=1):
+    """Decorador que guarda en disco el resultado de la función según sus argumentos
+
+    Se usa como @cache_en_disco o @cache_en_disco(version=n). Hay que subir
+    version cada vez que cambie lo que devuelve la función, para que tras un
+    despliegue no se sirvan resultados guardados por el código anterior.
+    """
+    if funcion is None:
+        return lambda f: cache_en_disco(f, version)
+    nombre = f"{funcion.__module__}.{funcion.__name__}"
+    
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if not CACHE_ACTIVO:
+            return funcion(*args, **kwargs)
+        try:
+            clave = clave_cache(nombre, args, kwargs, version)
+            resultado = leer(clave)
+        except (sqlite3.Error, OSError, ValueError, TypeError):
+            return funcion(*args, **kwargs)
+        if resultado is not None:
+            return resultado
+        
+        resultado = funcion(*args, **kwargs)
+        try:
+            guardar(clave, nombre, resultado)
+        except (sqlite3.Error, OSError):
+            pass
+        return resultado
+    return envoltura
@@ -1,78 +1,476 @@
 import numpy as np
 import pandas as pd
+from utils.impuestos import impuesto_por_tramos, impuesto_mixto, tabla_combinada
+from utils.perfilado import cronometrar, medir
+from utils.cache_disco import cache_en_disco
+from utils.fechas import fraccion_ano, cupones_vecinos
+from utils import nucleos
+
+PERIODOS_ANUALES = {'Mensual': 12, 'Bimestral': 6, 'Trimestral': 4,
+                    'Cuatrimestral': 3, 'Semestral': 2, 'Anual': 1}
 
 def tasa_equivalente(tea, periodos_anuales):
     """Convierte TEA a tasa periódica equivalente"""
     return (1 + tea/100) ** (1/periodos_anuales) - 1
 
+def factores_crecimiento(tasa_periodica, periodos_totales):
+    """Devuelve los factores (1 + tasa)^k para k = 1..periodos_totales"""
+    return (1 + tasa_periodica) ** np.arange(1, periodos_totales + 1)
+
+def saldos_cartera(monto_inicial, aporte_periodico, tasa_periodica, periodos_totales, factor=None):
+    """Calcula el saldo inicial y final de cada periodo en forma vectorizada"""
+    periodos = np.arange(1, periodos_totales + 1)
+    if factor is None:
+        factor = factores_crecimiento(tasa_periodica, periodos_totales)
+    else:
+        factor = factor[:periodos_totales]
+    if tasa_periodica == 0:
+        anualidad = periodos.astype(float)
+    else:
+        anualidad = (factor - 1) / tasa_periodica
+    saldo = monto_inicial * factor + aporte_periodico * anualidad
+    saldo_previo = np.concatenate(([monto_inicial], saldo))[:-1]
+    return periodos, saldo_previo, saldo
+
+def armar_resultado_cartera(monto_inicial, aporte_periodico, tasa_periodica, periodos, saldo_previo, saldo):
+    """Arma la tabla de la cartera y sus totales a partir de los arreglos de saldos"""
+    aportes = monto_inicial + aporte_periodico * periodos
+    
+    with medir('utils.calculos.dataframe_cartera'):
+        df = pd.DataFrame({
+            'Periodo': periodos,
+            'Aporte': aporte_periodico,
+            'Interés': np.round(saldo_previo * tasa_periodica, 2),
+            'Saldo': np.round(saldo, 2),
+            'Total Aportes': np.round(aportes, 2)
+        })
+    
+    saldo_final = float(saldo[-1]) if len(saldo) > 0 else monto_inicial
+    total_aportes = monto_inicial + aporte_periodico * len(periodos)
+    return df, saldo_final, total_aportes
+
+@cronometrar()
+@cache_en_disco
 def calcular_crecimiento_cartera(monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales):
     """Calcula el crecimiento de la cartera periodo por periodo"""
     tasa_periodica = tasa_equivalente(tea, periodos_anuales)
     
-    datos = []
-    saldo = monto_inicial
-    total_aportes = monto_inicial
+    periodos, saldo_previo, saldo = saldos_cartera(
+        monto_inicial, aporte_periodico, tasa_periodica, periodos_totales
+    )
+    return armar_resultado_cartera(
+        monto_inicial, aporte_periodico, tasa_periodica, periodos, saldo_previo, saldo
+    )
+
+def saldos_cartera_retencion(monto_inicial, aporte_periodico, tasa_periodica, periodos_totales,
+                             limites, tasas, acumulado, backend=None):
+    """Interés, retención y saldo de cada periodo reteniendo por tramos sobre la ganancia acumulada
+
+    Dentro de un tramo la tasa neta es fija, así que cada tramo se resuelve
+    en forma cerrada con saldos_cartera y searchsorted ubica el periodo en
+    que la ganancia acumulada pasa al tramo siguiente; solo ese periodo,
+    que reparte su interés entre dos tramos, se calcula aparte. Si Numba
+    está disponible se usa el núcleo compilado de utils.nucleos.
+    """
+    if (backend or nucleos.BACKEND) == 'numba':
+        return nucleos.saldos_retencion(monto_inicial, aporte_periodico, tasa_periodica, periodos_totales,
+                                        limites, tasas, acumulado)
+    interes = np.empty(periodos_totales)
+    retencion = np.empty(periodos_totales)
+    saldo = np.empty(periodos_totales)
+    
+    def impuesto(ganancia):
+        tramo = np.searchsorted(limites, ganancia, side='right') - 1
+        return acumulado[tramo] + (ganancia - limites[tramo]) * tasas[tramo]
     
-    for periodo in range(1, periodos_totales + 1):
-        interes = saldo * tasa_periodica
-        saldo = saldo + interes + aporte_periodico
-        total_aportes += aporte_periodico
+    k = 0
+    actual = float(monto_inicial)
+    ganancia = 0.0
+    while k < periodos_totales:
+        tramo = np.searchsorted(limites, ganancia, side='right') - 1
+        siguiente = limites[tramo + 1] if tramo + 1 < len(limites) else np.inf
+        _, previo, tramo_saldo = saldos_cartera(
+            actual, aporte_periodico, tasa_periodica * (1 - tasas[tramo]), periodos_totales - k
+        )
+        tramo_interes = previo * tasa_periodica
+        ganancia_tramo = ganancia + np.cumsum(tramo_interes)
+        dentro = int(np.searchsorted(ganancia_tramo, siguiente, side='right'))
+        
+        interes[k:k + dentro] = tramo_interes[:dentro]
+        retencion[k:k + dentro] = tramo_interes[:dentro] * tasas[tramo]
+        saldo[k:k + dentro] = tramo_saldo[:dentro]
+        if dentro > 0:
+            actual = float(tramo_saldo[dentro - 1])
+            ganancia = float(ganancia_tramo[dentro - 1])
+        k += dentro
         
-        datos.append({
-            'Periodo': periodo,
+        if k < periodos_totales:
+            # Periodo que cruza el límite: se retiene la diferencia de impuesto entre ambos lados
+            interes[k] = actual * tasa_periodica
+            retencion[k] = impuesto(ganancia + interes[k]) - impuesto(ganancia)
+            ganancia += interes[k]
+            actual += interes[k] - retencion[k] + aporte_periodico
+            saldo[k] = actual
+            k += 1
+    return interes, retencion, saldo
+
+@cronometrar()
+def calcular_crecimiento_cartera_neto(monto_inicial, aporte_periodico, tea, periodos_totales,
+                                      periodos_anuales, asignacion):
+    """Calcula el crecimiento de la cartera reteniendo impuesto sobre el interés de cada periodo
+
+    La retención es progresiva: cada periodo paga la tasa del tramo en que
+    cae la ganancia acumulada hasta ese momento.
+    """
+    tasa_periodica = tasa_equivalente(tea, periodos_anuales)
+    periodos = np.arange(1, periodos_totales + 1)
+    interes, retencion, saldo = saldos_cartera_retencion(
+        monto_inicial, aporte_periodico, tasa_periodica, periodos_totales, *tabla_combinada(asignacion)
+    )
+    aportes = monto_inicial + aporte_periodico * periodos
+    
+    with medir('utils.calculos.dataframe_cartera'):
+        df = pd.DataFrame({
+            'Periodo': periodos,
             'Aporte': aporte_periodico,
-            'Interés': round(interes, 2),
-            'Saldo': round(saldo, 2),
-            'Total Aportes': round(total_aportes, 2)
+            'Interés': np.round(interes, 2),
+            'Retención': np.round(retencion, 2),
+            'Saldo': np.round(saldo, 2),
+            'Total Aportes': np.round(aportes, 2)
         })
     
-    return pd.DataFrame(datos), saldo, total_aportes
+    saldo_final = float(saldo[-1]) if periodos_totales > 0 else monto_inicial
+    total_aportes = monto_inicial + aporte_periodico * periodos_totales
+    return df, saldo_final, total_aportes, float(retencion.sum())
+
+def saldos_cuentas_mensuales(monto_inicial, aporte_periodico, tea, periodos_anuales, anos):
+    """Saldo y aportes acumulados de varias cuentas sobre una línea de tiempo mensual común
+
+    Cada parámetro recibe un valor por cuenta. Los aportes se hacen al
+    final de cada periodo de la cuenta (cada 12 / periodos_anuales meses)
+    y entre aportes el saldo crece a la tasa mensual equivalente, así que
+    en las fechas de aporte coincide con calcular_crecimiento_cartera.
+    Devuelve matrices de forma (cuentas, meses).
+    """
+    monto_inicial, aporte_periodico, tea, periodos_anuales = (
+        np.atleast_1d(np.asarray(x, dtype=float)) for x in (monto_inicial, aporte_periodico, tea, periodos_anuales)
+    )
+    meses = np.arange(1, int(anos * 12) + 1)
+    largo = (12 / periodos_anuales)[:, None]
+    tasa_mensual = tasa_equivalente(tea, 12)[:, None]
+    tasa_periodica = tasa_equivalente(tea, periodos_anuales)[:, None]
+    
+    aportes_hechos = np.floor(meses / largo)
+    crecimiento = (1 + tasa_mensual) ** meses
+    desde_ultimo_aporte = (1 + tasa_mensual) ** (meses - aportes_hechos * largo)
+    con_tasa = tasa_periodica != 0
+    anualidad = np.where(
+        con_tasa,
+        ((1 + tasa_periodica) ** aportes_hechos - 1) / np.where(con_tasa, tasa_periodica, 1),
+        aportes_hechos
+    )
+    
+    saldo = monto_inicial[:, None] * crecimiento + aporte_periodico[:, None] * desde_ultimo_aporte * anualidad
+    aportes = monto_inicial[:, None] + aporte_periodico[:, None] * aportes_hechos
+    return meses, saldo, aportes
+
+@cronometrar()
+def calcular_cartera_consolidada(monto_inicial, aporte_periodico, tea, periodos_anuales, anos):
+    """Suma varias cuentas en un solo cronograma mensual con el formato de calcular_crecimiento_cartera"""
+    meses, saldo, aportes = saldos_cuentas_mensuales(monto_inicial, aporte_periodico, tea, periodos_anuales, anos)
+    saldo_total = saldo.sum(axis=0)
+    aportes_total = aportes.sum(axis=0)
+    
+    saldo_previo = np.concatenate(([np.sum(monto_inicial)], saldo_total))[:-1]
+    aporte_mes = np.diff(np.concatenate(([np.sum(monto_inicial)], aportes_total)))
+    
+    df = pd.DataFrame({
+        'Periodo': meses,
+        'Aporte': np.round(aporte_mes, 2),
+        'Interés': np.round(saldo_total - saldo_previo - aporte_mes, 2),
+        'Saldo': np.round(saldo_total, 2),
+        'Total Aportes': np.round(aportes_total, 2)
+    })
+    saldo_final = float(saldo_total[-1]) if len(meses) else float(np.sum(monto_inicial))
+    total_aportes = float(aportes_total[-1]) if len(meses) else float(np.sum(monto_inicial))
+    return df, saldo_final, total_aportes
+
+def pension_indexada(capital, tasa_mensual, meses, indexacion_mensual=0):
+    """Primer retiro de una pensión que crece cada mes y agota el capital al final"""
+    capital = np.asarray(capital, dtype=float)
+    tasa_mensual = np.asarray(tasa_mensual, dtype=float)
+    meses = np.asarray(meses, dtype=float)
+    indexacion_mensual = np.asarray(indexacion_mensual, dtype=float)
+    
+    iguales = np.isclose(tasa_mensual, indexacion_mensual)
+    razon = (1 + indexacion_mensual) / (1 + tasa_mensual)
+    divisor = np.where(iguales, 1, 1 - razon ** meses)
+    return np.where(
+        iguales,
+        capital * (1 + tasa_mensual) / meses,
+        capital * (tasa_mensual - indexacion_mensual) / divisor
+    )
 
-def calcular_pension_mensual(capital, tea, anos_retiro):
-    """Calcula la pensión mensual que se puede retirar"""
+@cronometrar()
+@cache_en_disco
+def calcular_pension_mensual(capital, tea, anos_retiro, inflacion=0):
+    """Calcula la pensión mensual que se puede retirar (la primera, si se indexa a la inflación)"""
     tasa_mensual = tasa_equivalente(tea, 12)
-    meses = anos_retiro * 12
+    indexacion = tasa_equivalente(inflacion, 12)
+    pension = pension_indexada(capital, tasa_mensual, np.asarray(anos_retiro) * 12, indexacion)
+    return float(pension) if pension.ndim == 0 else pension
+
+@cronometrar()
+def cronograma_retiro(capital, tea, anos_retiro, inflacion=0, pension=None):
+    """Calcula saldo, interés y retiro de cada mes de la jubilación para uno o varios clientes
+
+    Todos los parámetros aceptan escalares o arreglos de un valor por
+    cliente. Devuelve arreglos de forma (clientes, meses); los meses
+    posteriores al plazo de cada cliente quedan en cero.
+    """
+    capital = np.atleast_1d(np.asarray(capital, dtype=float))
+    tasa = np.broadcast_to(tasa_equivalente(np.asarray(tea, dtype=float), 12), capital.shape)
+    indexacion = np.broadcast_to(tasa_equivalente(np.asarray(inflacion, dtype=float), 12), capital.shape)
+    meses_cliente = np.broadcast_to(np.asarray(anos_retiro) * 12, capital.shape).astype(int)
+    if pension is None:
+        pension = pension_indexada(capital, tasa, meses_cliente, indexacion)
+    pension = np.broadcast_to(np.asarray(pension, dtype=float), capital.shape)
     
-    if tasa_mensual == 0:
-        pension = capital / meses
-    else:
-        pension = capital * tasa_mensual / (1 - (1 + tasa_mensual) ** (-meses))
+    meses = np.arange(1, int(meses_cliente.max(initial=0)) + 1)
+    activo = meses <= meses_cliente[:, None]
+    crecimiento = (1 + tasa[:, None]) ** meses
+    retiro = np.where(activo, pension[:, None] * (1 + indexacion[:, None]) ** (meses - 1), 0.0)
+    
+    saldo = crecimiento * (capital[:, None] - np.cumsum(retiro / crecimiento, axis=1))
+    saldo = np.where(activo, np.maximum(saldo, 0), 0.0)
+    saldo_previo = np.concatenate((capital[:, None], saldo[:, :-1]), axis=1)
+    interes = np.where(activo, saldo_previo * tasa[:, None], 0.0)
     
-    return pension
+    return {'mes': meses, 'retiro': retiro, 'interes': interes, 'saldo': saldo}
 
+def calcular_cronograma_retiro(capital, tea, anos_retiro, inflacion=0):
+    """Devuelve el cronograma de retiro de un cliente como DataFrame"""
+    cronograma = cronograma_retiro(capital, tea, anos_retiro, inflacion)
+    return pd.DataFrame({
+        'Mes': cronograma['mes'],
+        'Retiro': np.round(cronograma['retiro'][0], 2),
+        'Interés': np.round(cronograma['interes'][0], 2),
+        'Saldo': np.round(cronograma['saldo'][0], 2),
+        'Retiro Acumulado': np.round(np.cumsum(cronograma['retiro'][0]), 2)
+    })
+
+@cronometrar()
 def calcular_impuesto(ganancia, tipo_impuesto):
     """Calcula el impuesto sobre la ganancia"""
-    tasas = {'local': 0.05, 'extranjera': 0.295}
-    return ganancia * tasas.get(tipo_impuesto, 0)
+    if isinstance(tipo_impuesto, dict):
+        return float(impuesto_mixto(ganancia, tipo_impuesto))
+    return float(impuesto_por_tramos(ganancia, tipo_impuesto))
+
+TIPOS_BONO = ('bullet', 'amortizable', 'flotante')
+
+def generar_flujos_bono(tipo, valor_nominal, tasa_cupon, periodos_anuales, anos, tasas_forward=None):
+    """Genera cupones y amortizaciones de uno o varios bonos como matrices (bonos, periodos)
+
+    tipo puede ser 'bullet' (principal al vencimiento), 'amortizable'
+    (principal en cuotas iguales, cupón sobre el saldo) o 'flotante'
+    (cupón = tasa forward del año + tasa_cupon como spread, ambos en % TEA).
+    tasas_forward es la curva anual usada por los flotantes; su último
+    valor se repite. Los periodos posteriores al vencimiento quedan en cero.
+    """
+    tipo = np.atleast_1d(np.asarray(tipo))
+    valor_nominal, tasa_cupon, periodos_anuales, anos = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (valor_nominal, tasa_cupon, periodos_anuales, anos))
+    )
+    tipo = np.broadcast_to(tipo, valor_nominal.shape)
+    if not np.isin(tipo, TIPOS_BONO).all():
+        raise ValueError(f"Tipo de bono desconocido; use uno de: {', '.join(TIPOS_BONO)}")
+    
+    periodos_totales = np.rint(anos * periodos_anuales).astype(int)
+    periodos = np.arange(1, int(periodos_totales.max(initial=0)) + 1)
+    activo = periodos <= periodos_totales[:, None]
+    
+    tasa = np.broadcast_to(tasa_equivalente(tasa_cupon, periodos_anuales)[:, None], activo.shape)
+    flotante = tipo == 'flotante'
+    if flotante.any():
+        if tasas_forward is None or len(tasas_forward) == 0:
+            raise ValueError("Los bonos flotantes requieren una curva de tasas forward")
+        curva = np.asarray(tasas_forward, dtype=float)
+        ano = (periodos - 1) // periodos_anuales[:, None]
+        forward = curva[np.minimum(ano, len(curva) - 1).astype(int)]
+        tasa = np.where(flotante[:, None],
+                        tasa_equivalente(forward + tasa_cupon[:, None], periodos_anuales[:, None]),
+                        tasa)
+    
+    cuota = valor_nominal / np.maximum(periodos_totales, 1)
+    al_vencimiento = np.where(periodos == periodos_totales[:, None], valor_nominal[:, None], 0.0)
+    principal = np.where((tipo == 'amortizable')[:, None], cuota[:, None], al_vencimiento)
+    principal = np.where(activo, principal, 0.0)
+    
+    saldo_previo = valor_nominal[:, None] - np.cumsum(principal, axis=1) + principal
+    cupon = np.where(activo, saldo_previo * tasa, 0.0)
+    return {'periodo': periodos, 'cupon': cupon, 'principal': principal, 'activo': activo}
+
+def valorar_flujos(flujos, tea_mercado, periodos_anuales):
+    """Descuenta las matrices de flujos de generar_flujos_bono y devuelve el VP de cada flujo"""
+    tasa = tasa_equivalente(np.asarray(tea_mercado, dtype=float), np.asarray(periodos_anuales, dtype=float))
+    tasa = np.broadcast_to(np.atleast_1d(tasa), (flujos['cupon'].shape[0],))
+    descuento = (1 + tasa[:, None]) ** -flujos['periodo']
+    return (flujos['cupon'] + flujos['principal']) * descuento
 
-def calcular_valor_bono(valor_nominal, tasa_cupon, frecuencia_pago, anos, tea_mercado):
+@cronometrar()
+@cache_en_disco(version=2)  # 2: columnas Cupón y Amortización
+def calcular_valor_bono(valor_nominal, tasa_cupon, frecuencia_pago, anos, tea_mercado,
+                        tipo='bullet', tasas_forward=None):
     """Calcula el valor presente de un bono"""
-    periodos_anuales = {'Mensual': 12, 'Bimestral': 6, 'Trimestral': 4, 
-                        'Cuatrimestral': 3, 'Semestral': 2, 'Anual': 1}
+    n_periodos = PERIODOS_ANUALES[frecuencia_pago]
     
-    n_periodos = periodos_anuales[frecuencia_pago]
-    periodos_totales = anos * n_periodos
+    flujos = generar_flujos_bono(tipo, valor_nominal, tasa_cupon, n_periodos, anos, tasas_forward)
+    vp_flujos = valorar_flujos(flujos, tea_mercado, n_periodos)[0]
+    cupon = flujos['cupon'][0]
+    principal = flujos['principal'][0]
     
-    tasa_cupon_periodica = tasa_equivalente(tasa_cupon, n_periodos)
-    tasa_descuento_periodica = tasa_equivalente(tea_mercado, n_periodos)
+    df = pd.DataFrame({
+        'Periodo': flujos['periodo'],
+        'Cupón': np.round(cupon, 2),
+        'Amortización': np.round(principal, 2),
+        'Flujo': np.round(cupon + principal, 2),
+        'VP Flujo': np.round(vp_flujos, 2)
+    })
+    return df, float(vp_flujos.sum())
+
+@cronometrar()
+def valorar_bono_a_fecha(fecha_liquidacion, fecha_vencimiento, valor_nominal, tasa_cupon, periodos_anuales,
+                         tea_mercado, convencion='30/360', tipo='bullet', tasas_forward=None):
+    """Precio sucio, interés corrido y precio limpio a una fecha de liquidación cualquiera
+
+    Acepta escalares o arreglos (un valor por bono). valor_nominal es el
+    principal vigente a la fecha; el primer periodo es fraccionario y se
+    mide con la convención de días indicada.
+    """
+    periodos_anuales = np.atleast_1d(np.asarray(periodos_anuales, dtype=int))
+    anterior, proximo, restantes = cupones_vecinos(fecha_liquidacion, fecha_vencimiento, periodos_anuales)
+    restantes = np.atleast_1d(restantes)
     
-    cupon = valor_nominal * tasa_cupon_periodica
+    flujos = generar_flujos_bono(tipo, valor_nominal, tasa_cupon, periodos_anuales,
+                                 restantes / periodos_anuales, tasas_forward)
     
-    flujos = []
-    vp_total = 0
+    # Parte del periodo actual que falta transcurrir hasta el próximo cupón
+    periodo_actual = np.atleast_1d(fraccion_ano(anterior, proximo, convencion))
+    transcurrido = np.atleast_1d(fraccion_ano(anterior, fecha_liquidacion, convencion))
+    falta = np.where(periodo_actual > 0, 1 - transcurrido / np.where(periodo_actual > 0, periodo_actual, 1), 0)
     
-    for periodo in range(1, periodos_totales + 1):
-        flujo = cupon
-        if periodo == periodos_totales:
-            flujo += valor_nominal
+    tasa = tasa_equivalente(np.asarray(tea_mercado, dtype=float), periodos_anuales)
+    vigente = restantes > 0
+    precio_sucio = valorar_flujos(flujos, tea_mercado, periodos_anuales).sum(axis=1) * (1 + tasa) ** (1 - falta)
+    cupon_actual = flujos['cupon'][:, 0] if flujos['cupon'].shape[1] else np.zeros(len(restantes))
+    interes_corrido = np.where(vigente, cupon_actual * (1 - falta), 0.0)
+    
+    return {
+        'cupon_anterior': anterior,
+        'proximo_cupon': proximo,
+        'cupones_restantes': restantes,
+        'precio_sucio': np.where(vigente, precio_sucio, 0.0),
+        'interes_corrido': interes_corrido,
+        'precio_limpio': np.where(vigente, precio_sucio - interes_corrido, 0.0)
+    }
+
+@cronometrar()
+def valorar_bonos_estructurados(tipo, valor_nominal, tasa_cupon, periodos_anuales, anos, tea_mercado,
+                                tasas_forward=None, tamano_bloque=5000):
+    """Valora un libro con bonos de distintas estructuras, por bloques para acotar la memoria"""
+    tipo = np.atleast_1d(np.asarray(tipo))
+    columnas = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float))
+          for x in (valor_nominal, tasa_cupon, periodos_anuales, anos, tea_mercado))
+    )
+    tipo = np.broadcast_to(tipo, columnas[0].shape)
+    vp = np.empty(columnas[0].shape)
+    for inicio in range(0, len(vp), tamano_bloque):
+        bloque = slice(inicio, inicio + tamano_bloque)
+        nominal, cupon, frecuencia, plazo, tea = (c[bloque] for c in columnas)
+        flujos = generar_flujos_bono(tipo[bloque], nominal, cupon, frecuencia, plazo, tasas_forward)
+        vp[bloque] = valorar_flujos(flujos, tea, frecuencia).sum(axis=1)
+    return vp
+
+PILARES_CURVA = (1, 2, 3, 5, 7, 10, 20, 30)
+# Tope de elementos del tensor (bonos, periodos, pilares) por bloque: ~32 MB en float64
+MAX_ELEMENTOS_TENSOR = 4_000_000
+
+def pesos_pilares(plazo, pilares):
+    """Peso de cada pilar en el plazo (años) de cada flujo: triángulo con 1 en el pilar y 0 en los vecinos"""
+    identidad = np.eye(len(pilares))
+    return np.stack([np.interp(plazo, pilares, fila) for fila in identidad], axis=-1)
+
+def bloques_por_largo(largos, tope):
+    """Índices de bloques con largos parecidos tales que filas × largo máximo no pase del tope"""
+    orden = np.argsort(largos, kind='stable')
+    largos = np.maximum(np.asarray(largos)[orden], 1)
+    inicio = 0
+    while inicio < len(orden):
+        # Ordenados de menor a mayor, el último del bloque es el más largo
+        fin = min(len(orden), inicio + max(1, tope // largos[inicio]))
+        while fin - inicio > 1 and (fin - inicio) * largos[fin - 1] > tope:
+            fin = inicio + max(1, tope // largos[fin - 1])
+        yield orden[inicio:fin]
+        inicio = fin
+
+@cronometrar()
+def duraciones_tasa_clave(tipo, valor_nominal, tasa_cupon, periodos_anuales, anos, tea_mercado,
+                          pilares=PILARES_CURVA, salto_pb=1.0, tasas_forward=None):
+    """Duraciones por tasa clave de un libro de bonos: matriz (bonos, pilares)
+
+    Cada flujo se descuenta a la TEA del bono más el desplazamiento de la
+    curva en su plazo. Por cada pilar se sube y baja salto_pb puntos básicos
+    y se revalora todo el bloque de una vez con un tensor (bonos, periodos,
+    pilares); los bloques se arman para no pasar de MAX_ELEMENTOS_TENSOR.
+    Los cupones de los flotantes se mantienen con la curva forward dada.
+    Devuelve (vp, krd); la suma de cada fila es la duración efectiva.
+    """
+    tipo = np.atleast_1d(np.asarray(tipo))
+    columnas = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float))
+          for x in (valor_nominal, tasa_cupon, periodos_anuales, anos, tea_mercado))
+    )
+    tipo = np.broadcast_to(tipo, columnas[0].shape)
+    pilares = np.asarray(pilares, dtype=float)
+    salto = salto_pb / 10_000
+    
+    periodos_totales = np.rint(columnas[2] * columnas[3]).astype(int)
+    vp = np.empty(len(periodos_totales))
+    krd = np.empty((len(periodos_totales), len(pilares)))
+    for bloque in bloques_por_largo(periodos_totales, MAX_ELEMENTOS_TENSOR // len(pilares)):
+        nominal, cupon, frecuencia, plazo, tea = (c[bloque] for c in columnas)
+        flujos = generar_flujos_bono(tipo[bloque], nominal, cupon, frecuencia, plazo, tasas_forward)
+        flujo = flujos['cupon'] + flujos['principal']
+        plazo_flujo = flujos['periodo'] / frecuencia[:, None]
+        tasa = tea[:, None, None] / 100
+        pesos = pesos_pilares(plazo_flujo, pilares)
         
-        vp_flujo = flujo / ((1 + tasa_descuento_periodica) ** periodo)
-        vp_total += vp_flujo
+        with medir('utils.calculos.tensor_tasa_clave'):
+            vp_bloque = (flujo * np.exp(-plazo_flujo * np.log1p(tasa[:, :, 0]))).sum(axis=1)
+            sube = np.einsum('bp,bpk->bk', flujo, np.exp(-plazo_flujo[:, :, None] * np.log1p(tasa + salto * pesos)))
+            baja = np.einsum('bp,bpk->bk', flujo, np.exp(-plazo_flujo[:, :, None] * np.log1p(tasa - salto * pesos)))
         
-        flujos.append({
-            'Periodo': periodo,
-            'Flujo': round(flujo, 2),
-            'VP Flujo': round(vp_flujo, 2)
-        })
+        vp[bloque] = vp_bloque
+        con_valor = vp_bloque[:, None] > 0
+        krd[bloque] = np.where(con_valor, (baja - sube) / (2 * salto * np.where(con_valor, vp_bloque[:, None], 1)), 0.0)
+    return vp, krd
+
+@cronometrar()
+def valorar_bonos_lote(valor_nominal, tasa_cupon, periodos_anuales, anos, tea_mercado):
+    """Calcula el valor presente de muchos bonos bullet a la vez"""
+    valor_nominal = np.asarray(valor_nominal, dtype=float)
+    periodos_anuales = np.asarray(periodos_anuales, dtype=float)
+    periodos_totales = np.asarray(anos, dtype=float) * periodos_anuales
+    
+    cupon = valor_nominal * tasa_equivalente(np.asarray(tasa_cupon, dtype=float), periodos_anuales)
+    tasa = tasa_equivalente(np.asarray(tea_mercado, dtype=float), periodos_anuales)
     
-    return pd.DataFrame(flujos), vp_total
\ No newline at end of file
+    descuento = (1 + tasa) ** -periodos_totales
+    con_tasa = tasa != 0
+    anualidad = np.where(
+        con_tasa,
+        (1 - descuento) / np.where(con_tasa, tasa, 1),
+        periodos_totales
+    )
+    return cupon * anualidad + valor_nominal * descuento
@@ -0,0 +1,106 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+from utils.perfilado import medir
+
+# Librerías que la primera sesión tendría que importar de todas formas
+MODULOS_PESADOS = [
+    'numpy', 'pandas', 'plotly.graph_objects', 'reportlab.platypus',
+    'matplotlib.figure', 'matplotlib.backends.backend_agg'
+]
+
+_candado = threading.Lock()
+_resultado = None
+_log = logging.getLogger(__name__)
+
+def _importar():
+    for nombre in MODULOS_PESADOS:
+        importlib.import_module(nombre)
+
+def _plotly():
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Scatter(x=[1, 2], y=[1, 2], mode='lines', fill='tozeroy'))
+    fig.add_trace(go.Bar(x=[1, 2], y=[1, 2]))
+    fig.update_layout(template='plotly_white')
+    fig.to_json()
+
+def _calculos():
+    from utils.calculos import (calcular_crecimiento_cartera, calcular_impuesto, calcular_pension_mensual,
+                                calcular_cronograma_retiro, calcular_valor_bono)
+    calcular_crecimiento_cartera(1000.0, 100.0, 8.0, 12, 12)
+    calcular_impuesto(1000.0, 'extranjera')
+    calcular_pension_mensual(10000.0, 5.0, 1)
+    calcular_cronograma_retiro(10000.0, 5.0, 1)
+    calcular_valor_bono(1000.0, 6.0, 'Semestral', 1, 7.0)
+
+def _nucleos():
+    # Con Numba carga (o compila la primera vez) los núcleos de centavos y de retención por periodo
+    from utils.calculos import calcular_crecimiento_cartera_neto
+    from utils.dinero import saldos_cartera_centavos
+    saldos_cartera_centavos([100, 100], 100, 10**10, 1)
+    calcular_crecimiento_cartera_neto(1000.0, 100.0, 8.0, 12, 12, {'extranjera': 1.0})
+
+def _presets():
+    from utils.presets import catalogo
+    catalogo()
+
+def _reporte():
+    from utils.exportar import generar_pdf_reporte, grafico_cartera
+    from utils.presets import PRESETS, ESCENARIO_INICIO, resultado_cartera
+    df, saldo_final, _ = resultado_cartera(ESCENARIO_INICIO)
+    p = PRESETS[ESCENARIO_INICIO]
+    generar_pdf_reporte({
+        'monto_inicial': p['monto_inicial'],
+        'aporte_periodico': p['aporte_periodico'],
+        'tea': p['tea'],
+        'anos': p['anos'],
+        'saldo_final': saldo_final,
+        'grafico': grafico_cartera(df)
+    }, None)
+
+ETAPAS = [
+    ('importar', _importar),
+    ('plotly', _plotly),
+    ('calculos', _calculos),
+    ('nucleos', _nucleos),
+    ('presets', _presets),
+    ('reporte', _reporte),
+]
+
+def calentar():
+    """Prepara el proceso una sola vez antes de atender la primera consulta
+
+    Importa las librerías pesadas, ejecuta un cálculo pequeño por módulo,
+    arma el catálogo de escenarios y genera un reporte con gráfica. Devuelve
+    los milisegundos de cada etapa y, en 'errores', las etapas que fallaron;
+    un fallo solo se registra, porque la aplicación funciona sin calentar.
+    Las llamadas siguientes devuelven lo mismo sin repetir el trabajo.
+    CALC_CALENTAR=0 lo desactiva.
+    """
+    global _resultado
+    if _resultado is not None:
+        return _resultado
+    with _candado:
+        if _resultado is None:
+            tiempos = {}
+            if os.environ.get('CALC_CALENTAR', '1') != '0':
+                errores = {}
+                inicio_total = time.perf_counter()
+                for etapa, funcion in ETAPAS:
+                    inicio = time.perf_counter()
+                    try:
+                        with medir(f'utils.calentamiento.{etapa}'):
+                            funcion()
+                    except Exception as e:
+                        errores[etapa] = f"{type(e).__name__}: {e}"
+                        _log.warning("Falló la etapa %s del calentamiento", etapa, exc_info=True)
+                    tiempos[etapa] = round((time.perf_counter() - inicio) * 1000, 1)
+                tiempos['total'] = round((time.perf_counter() - inicio_total) * 1000, 1)
+                tiempos['errores'] = errores
+                _log.info("Calentamiento listo en %.0f ms: %s", tiempos['total'],
+                          ", ".join(f"{e} {tiempos[e]:.0f} ms" for e, _ in ETAPAS))
+            _resultado = tiempos
+    return _resultado
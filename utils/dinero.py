@@ -0,0 +1,151 @@
+import time
+
+import numpy as np
+import pandas as pd
+from utils.calculos import tasa_equivalente, saldos_cartera
+from utils.perfilado import cronometrar, medir
+from utils import nucleos
+from utils.nucleos import ESCALA_TASA, PARTE_TASA as _PARTE
+
+# La tasa periódica se fija con 12 decimales (ESCALA_TASA), igual que la registraría el libro contable
+REDONDEOS = ('mitad_par', 'mitad_arriba', 'truncar')
+# Con TEA de hasta 50% el producto intermedio cabe en int64 hasta este saldo
+SALDO_MAXIMO_CENTAVOS = (np.iinfo(np.int64).max // (ESCALA_TASA // 2)) * _PARTE
+
+def a_centavos(monto):
+    """Convierte montos en dólares a centavos enteros (int64)"""
+    return np.rint(np.asarray(monto, dtype=float) * 100).astype(np.int64)
+
+def tasa_fija(tasa_periodica):
+    """Convierte una tasa periódica a entero con ESCALA_TASA"""
+    return np.rint(np.asarray(tasa_periodica, dtype=float) * ESCALA_TASA).astype(np.int64)
+
+def _redondear(cociente, resto, redondeo):
+    if redondeo == 'mitad_arriba':
+        return cociente + (2 * resto >= ESCALA_TASA)
+    if redondeo == 'mitad_par':
+        return cociente + ((2 * resto > ESCALA_TASA) | ((2 * resto == ESCALA_TASA) & (cociente % 2 == 1)))
+    if redondeo == 'truncar':
+        return cociente
+    raise ValueError(f"Redondeo desconocido; use uno de: {', '.join(REDONDEOS)}")
+
+def aplicar_tasa(centavos, tasa, redondeo='mitad_par'):
+    """Calcula centavos × tasa fija redondeado al centavo sin salir de int64
+
+    centavos y tasa deben ser no negativos. El producto se parte en dos
+    mitades para no desbordar: centavos = alto·10⁶ + bajo.
+    """
+    alto, bajo = np.divmod(centavos, _PARTE)
+    entero, resto_alto = np.divmod(alto * tasa, ESCALA_TASA // _PARTE)
+    cociente, resto = np.divmod(resto_alto * _PARTE + bajo * tasa, ESCALA_TASA)
+    return _redondear(cociente + entero, resto, redondeo)
+
+def _saldos_una_cartera(monto_inicial, aporte_periodico, tasa, periodos_totales, redondeo):
+    # Con una sola cartera los enteros de Python son más rápidos que arreglos de un elemento
+    interes = np.empty((1, periodos_totales), dtype=np.int64)
+    saldo = np.empty_like(interes)
+    actual = monto_inicial
+    for k in range(periodos_totales):
+        cociente, resto = divmod(actual * tasa, ESCALA_TASA)
+        interes[0, k] = monto = _redondear(cociente, resto, redondeo)
+        actual += monto + aporte_periodico
+        saldo[0, k] = actual
+    return interes, saldo
+
+def saldos_cartera_centavos(monto_inicial, aporte_periodico, tasa, periodos_totales, redondeo='mitad_par',
+                            backend=None):
+    """Saldos de varias carteras en centavos redondeando el interés en cada periodo
+
+    monto_inicial, aporte_periodico (centavos) y tasa (fija) son escalares o
+    arreglos de una cartera por elemento. Devuelve interés y saldo con forma
+    (carteras, periodos); el bucle es por periodo y cada paso es vectorizado,
+    o el núcleo compilado de utils.nucleos si Numba está disponible.
+    """
+    monto_inicial, aporte_periodico, tasa = np.broadcast_arrays(
+        np.atleast_1d(monto_inicial).astype(np.int64),
+        np.atleast_1d(aporte_periodico).astype(np.int64),
+        np.atleast_1d(tasa).astype(np.int64)
+    )
+    if redondeo not in REDONDEOS:
+        raise ValueError(f"Redondeo desconocido; use uno de: {', '.join(REDONDEOS)}")
+    if (backend or nucleos.BACKEND) == 'numba':
+        interes, saldo = nucleos.saldos_centavos(monto_inicial, aporte_periodico, tasa, periodos_totales, redondeo)
+    elif len(monto_inicial) == 1:
+        interes, saldo = _saldos_una_cartera(
+            int(monto_inicial[0]), int(aporte_periodico[0]), int(tasa[0]), periodos_totales, redondeo
+        )
+    else:
+        interes = np.empty((len(monto_inicial), periodos_totales), dtype=np.int64)
+        saldo = np.empty_like(interes)
+        actual = monto_inicial.copy()
+        for k in range(periodos_totales):
+            interes[:, k] = aplicar_tasa(actual, tasa, redondeo)
+            actual = actual + interes[:, k] + aporte_periodico
+            saldo[:, k] = actual
+    if periodos_totales > 0 and saldo[:, -1].max() > SALDO_MAXIMO_CENTAVOS:
+        raise ValueError("El saldo supera el máximo representable en centavos enteros")
+    return interes, saldo
+
+@cronometrar()
+def calcular_crecimiento_cartera_exacto(monto_inicial, aporte_periodico, tea, periodos_totales,
+                                        periodos_anuales, redondeo='mitad_par'):
+    """Igual que calcular_crecimiento_cartera pero con centavos exactos en cada periodo"""
+    monto = int(a_centavos(monto_inicial))
+    aporte = int(a_centavos(aporte_periodico))
+    interes, saldo = saldos_cartera_centavos(
+        monto, aporte, tasa_fija(tasa_equivalente(tea, periodos_anuales)), periodos_totales, redondeo
+    )
+    periodos = np.arange(1, periodos_totales + 1)
+
+    with medir('utils.dinero.dataframe_cartera'):
+        df = pd.DataFrame({
+            'Periodo': periodos,
+            'Aporte': aporte / 100,
+            'Interés': interes[0] / 100,
+            'Saldo': saldo[0] / 100,
+            'Total Aportes': (monto + aporte * periodos) / 100
+        })
+
+    saldo_final = int(saldo[0, -1]) / 100 if periodos_totales > 0 else monto / 100
+    total_aportes = (monto + aporte * periodos_totales) / 100
+    return df, saldo_final, total_aportes
+
+def comparar_motores(carteras=10_000, periodos_totales=960, periodos_anuales=12, repeticiones=3):
+    """Mide el motor en flotantes contra el de centavos para un lote de carteras
+
+    Devuelve los milisegundos de cada motor (mejor de las repeticiones) y la
+    mayor diferencia en dólares entre los saldos finales.
+    """
+    rng = np.random.default_rng(0)
+    montos = np.round(rng.uniform(0, 50_000, carteras), 2)
+    aportes = np.round(rng.uniform(0, 2_000, carteras), 2)
+    tasas = tasa_equivalente(rng.uniform(0, 15, carteras), periodos_anuales)
+
+    def flotante():
+        return np.array([saldos_cartera(m, a, t, periodos_totales)[2] for m, a, t in zip(montos, aportes, tasas)])
+
+    def flotante_lote():
+        factor = (1 + tasas[:, None]) ** np.arange(1, periodos_totales + 1)
+        anualidad = np.where(tasas[:, None] > 0, (factor - 1) / np.where(tasas > 0, tasas, 1)[:, None],
+                             np.arange(1, periodos_totales + 1))
+        return montos[:, None] * factor + aportes[:, None] * anualidad
+
+    def exacto():
+        return saldos_cartera_centavos(a_centavos(montos), a_centavos(aportes), tasa_fija(tasas), periodos_totales)[1]
+
+    tiempos = {}
+    resultados = {}
+    for nombre, motor in (('flotante_por_cartera', flotante), ('flotante_lote', flotante_lote), ('centavos', exacto)):
+        mejor = float('inf')
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultados[nombre] = motor()
+            mejor = min(mejor, time.perf_counter() - inicio)
+        tiempos[nombre] = round(mejor * 1000, 1)
+    tiempos['diferencia_maxima_usd'] = float(
+        np.abs(resultados['flotante_lote'][:, -1] - resultados['centavos'][:, -1] / 100).max()
+    )
+    return tiempos
+
+if __name__ == '__main__':
+    print(comparar_motores())
@@ -6,7 +6,187 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from datetime import datetime
 import io
 from reportlab.platypus import Image
+from reportlab import rl_config
+from utils.perfilado import cronometrar, medir
+import threading
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.ticker import FixedFormatter, FixedLocator, MaxNLocator
+from PIL import Image as PILImage
 
+# Las imágenes van en binario: sin la extensión en C de reportlab, pasarlas a ASCII85
+# costaba más que dibujar las gráficas
+rl_config.useA85 = 0
+
+# Una figura por tipo de gráfica, con sus líneas y áreas creadas una sola vez; en cada
+# reporte solo se cambian los datos, los límites y las marcas. El fondo fijo (títulos y
+# leyenda, que va fuera de los ejes) se dibuja una vez y se restaura, así que en PNG solo
+# se redibujan marcas, bordes y datos. El candado de cada figura evita que dos sesiones
+# dibujen a la vez.
+_graficos = {}
+_candado_graficos = threading.Lock()
+_marcas_x = MaxNLocator(nbins=6, integer=True)
+_marcas_y = MaxNLocator(nbins=5)
+
+class _Grafico:
+    __slots__ = ('figura', 'ejes', 'artistas', 'dinamicos', 'fondo', 'candado')
+
+def _nueva_figura(titulo, eje_x, eje_y):
+    figura = Figure(figsize=(5.5, 3), dpi=110)
+    FigureCanvasAgg(figura)
+    ejes = figura.add_subplot(111)
+    figura.subplots_adjust(left=0.16, right=0.97, top=0.8, bottom=0.15)
+    ejes.set_title(titulo, fontsize=10, color='#2C3E50', pad=18)
+    # Títulos de los ejes como texto de la figura: quedan en el fondo fijo en vez de redibujarse con las marcas
+    figura.text(0.565, 0.01, eje_x, fontsize=8, ha='center', va='bottom')
+    figura.text(0.01, 0.525, eje_y, fontsize=8, rotation='vertical', ha='left', va='center')
+    ejes.tick_params(labelsize=7)
+    ejes.grid(True, color='#E5E5E5', linewidth=0.6)
+    ejes.set_axisbelow(True)
+    for borde in ('top', 'right'):
+        ejes.spines[borde].set_visible(False)
+    return figura, ejes
+
+def _area(ejes, **estilo):
+    area = PolyCollection([np.zeros((0, 2))], **estilo)
+    ejes.add_collection(area)
+    return area
+
+def _grafico(tipo, crear):
+    """Devuelve la figura del tipo con sus artistas, creándola la primera vez"""
+    with _candado_graficos:
+        if tipo not in _graficos:
+            grafico = _Grafico()
+            grafico.figura, grafico.ejes, grafico.artistas = crear()
+            ejes = grafico.ejes
+            # La leyenda va sobre los ejes, fuera del área de datos, para que quede en el fondo fijo
+            ejes.legend(fontsize=7, frameon=False, loc='lower center', bbox_to_anchor=(0.5, 1.0),
+                        ncols=len(ejes.get_legend_handles_labels()[0]), borderaxespad=0.2)
+            # En orden de dibujo: la grilla debajo de bordes y datos
+            grafico.dinamicos = (ejes.xaxis, ejes.yaxis, ejes.spines['left'], ejes.spines['bottom']) + grafico.artistas
+            for artista in grafico.dinamicos:
+                artista.set_animated(True)
+            grafico.fondo = None
+            grafico.candado = threading.Lock()
+            _graficos[tipo] = grafico
+        return _graficos[tipo]
+
+def _ajustar_ejes(ejes, x, y_max, margen_x=0.0):
+    """Fija límites y marcas con localizadores y etiquetas fijas para no recalcularlos al dibujar"""
+    x_min, x_max = (x[0], x[-1]) if len(x) > 0 else (0, 1)
+    if x_max <= x_min:
+        x_max = x_min + 1
+    marcas_x = [v for v in _marcas_x.tick_values(x_min, x_max) if x_min <= v <= x_max]
+    # 5% de holgura arriba, como el margen automático de matplotlib
+    marcas_y = _marcas_y.tick_values(0, y_max * 1.05 if y_max > 0 else 1)
+    ejes.xaxis.set_major_locator(FixedLocator(marcas_x))
+    ejes.xaxis.set_major_formatter(FixedFormatter([f"{v:,.0f}" for v in marcas_x]))
+    ejes.yaxis.set_major_locator(FixedLocator(marcas_y))
+    ejes.yaxis.set_major_formatter(FixedFormatter([f"${v:,.0f}" for v in marcas_y]))
+    ejes.set_xlim(x_min - margen_x, x_max + margen_x)
+    ejes.set_ylim(0, marcas_y[-1])
+
+def _exportar(grafico, formato):
+    """Devuelve la figura en PNG (restaurando el fondo fijo) o en un formato vectorial"""
+    buffer = io.BytesIO()
+    if formato != 'png':
+        # savefig dibuja todo, incluidos los artistas animados
+        grafico.figura.savefig(buffer, format=formato)
+        grafico.fondo = None
+        return buffer.getvalue()
+    
+    lienzo = grafico.figura.canvas
+    if grafico.fondo is None:
+        lienzo.draw()
+        grafico.fondo = lienzo.copy_from_bbox(grafico.figura.bbox)
+    else:
+        lienzo.restore_region(grafico.fondo)
+    for artista in grafico.dinamicos:
+        grafico.figura.draw_artist(artista)
+    imagen = PILImage.frombuffer('RGBA', lienzo.get_width_height(), lienzo.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+    imagen.convert('RGB').save(buffer, format='png', compress_level=0)
+    return buffer.getvalue()
+
+def _entre(x, abajo, arriba):
+    """Vértices del área entre dos curvas"""
+    return np.concatenate((np.column_stack((x, abajo)), np.column_stack((x[::-1], arriba[::-1]))))
+
+def _crear_cartera():
+    figura, ejes = _nueva_figura('Evolución de la Inversión', 'Periodo', 'Monto (USD)')
+    aportes, = ejes.plot([], [], color='#636EFA', linewidth=1.5, label='Aportes Acumulados')
+    saldo, = ejes.plot([], [], color='#00CC96', linewidth=2, label='Saldo Total')
+    area = _area(ejes, facecolor='#00CC96', alpha=0.2, linewidth=0)
+    return figura, ejes, (aportes, saldo, area)
+
+def _crear_jubilacion():
+    figura, ejes = _nueva_figura('Proyección de Retiro Mensual', 'Mes', 'Monto (USD)')
+    area = _area(ejes, facecolor='#00CC96', alpha=0.3, linewidth=0)
+    acumulado, = ejes.plot([], [], color='#00CC96', linewidth=2, label='Pensión Acumulada')
+    saldo, = ejes.plot([], [], color='#636EFA', linewidth=1.5, label='Saldo Restante')
+    capital = ejes.axhline(0, color='red', linestyle='--', linewidth=1, label='Capital Inicial')
+    return figura, ejes, (area, acumulado, saldo, capital)
+
+def _crear_bono():
+    figura, ejes = _nueva_figura('Flujos de Caja y Valor Presente', 'Periodo', 'Monto (USD)')
+    barras = _area(ejes, facecolor='lightblue', linewidth=0, label='Flujo de Caja')
+    vp, = ejes.plot([], [], color='red', linewidth=1.5, marker='o', markersize=3, label='VP de Flujo')
+    return figura, ejes, (barras, vp)
+
+@cronometrar()
+def grafico_cartera(df, formato='png'):
+    """Gráfica de aportes acumulados y saldo de la cartera"""
+    x = df['Periodo'].to_numpy(dtype=float)
+    total_aportes = df['Total Aportes'].to_numpy(dtype=float)
+    saldo = df['Saldo'].to_numpy(dtype=float)
+    grafico = _grafico('cartera', _crear_cartera)
+    linea_aportes, linea_saldo, area = grafico.artistas
+    with grafico.candado:
+        linea_aportes.set_data(x, total_aportes)
+        linea_saldo.set_data(x, saldo)
+        area.set_verts([_entre(x, total_aportes, saldo)])
+        _ajustar_ejes(grafico.ejes, x, max(saldo.max(initial=0), total_aportes.max(initial=0)))
+        return _exportar(grafico, formato)
+
+@cronometrar()
+def grafico_jubilacion(df_retiro, capital_neto, formato='png'):
+    """Gráfica de pensión acumulada y saldo restante durante el retiro"""
+    x = df_retiro['Mes'].to_numpy(dtype=float)
+    acumulado = df_retiro['Retiro Acumulado'].to_numpy(dtype=float)
+    saldo = df_retiro['Saldo'].to_numpy(dtype=float)
+    grafico = _grafico('jubilacion', _crear_jubilacion)
+    area, linea_acumulado, linea_saldo, capital = grafico.artistas
+    with grafico.candado:
+        area.set_verts([_entre(x, np.zeros_like(acumulado), acumulado)])
+        linea_acumulado.set_data(x, acumulado)
+        linea_saldo.set_data(x, saldo)
+        capital.set_ydata([capital_neto, capital_neto])
+        _ajustar_ejes(grafico.ejes, x, max(acumulado.max(initial=0), saldo.max(initial=0), capital_neto))
+        return _exportar(grafico, formato)
+
+@cronometrar()
+def grafico_bono(df, formato='png'):
+    """Gráfica de flujos de caja del bono y su valor presente"""
+    x = df['Periodo'].to_numpy(dtype=float)
+    flujo = df['Flujo'].to_numpy(dtype=float)
+    vp = df['VP Flujo'].to_numpy(dtype=float)
+    grafico = _grafico('bono', _crear_bono)
+    barras, linea_vp = grafico.artistas
+    with grafico.candado:
+        # Cada barra es un rectángulo de ancho 0.8 centrado en su periodo
+        izquierda, derecha = x - 0.4, x + 0.4
+        barras.set_verts(np.stack((
+            np.column_stack((izquierda, np.zeros_like(flujo))), np.column_stack((izquierda, flujo)),
+            np.column_stack((derecha, flujo)), np.column_stack((derecha, np.zeros_like(flujo)))
+        ), axis=1))
+        linea_vp.set_data(x, vp)
+        _ajustar_ejes(grafico.ejes, x, max(flujo.max(initial=0), vp.max(initial=0)), margen_x=0.6)
+        return _exportar(grafico, formato)
+
+@cronometrar()
 def generar_pdf_reporte(datos_cartera, datos_jubilacion, datos_bono=None):
     """Genera un PDF con el reporte completo en estilo profesional"""
     buffer = io.BytesIO()
@@ -175,6 +355,18 @@ def generar_pdf_reporte(datos_cartera, datos_jubilacion, datos_bono=None):
             elements.append(Image(img, width=5.5*inch, height=3*inch))
             elements.append(Spacer(1, 0.25*inch))
     
-    doc.build(elements)
+    with medir('utils.exportar.pdf_build'):
+        doc.build(elements)
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
+
+def datos_cartera_desde_almacen(lector, cliente, monto_inicial, aporte_periodico, tea, anos):
+    """Arma datos_cartera leyendo el saldo final del cronograma guardado, sin cargar el resto"""
+    columnas = lector.columnas_cliente(cliente)
+    return {
+        'monto_inicial': monto_inicial,
+        'aporte_periodico': aporte_periodico,
+        'tea': tea,
+        'anos': anos,
+        'saldo_final': float(columnas['Saldo'][-1]) if len(columnas['Saldo']) else monto_inicial
+    }
\ No newline at end of file
@@ -0,0 +1,84 @@
+import io
+import re
+
+from utils.perfilado import cronometrar
+
+FILAS_POR_BLOQUE = 50_000
+# Excel admite 1.048.576 filas por hoja; una es el encabezado
+FILAS_MAXIMAS_HOJA = 1_048_575
+
+def bloques_dataframe(df, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Parte un DataFrame en bloques para los escritores de este módulo"""
+    for inicio in range(0, len(df), filas_por_bloque):
+        yield df.iloc[inicio:inicio + filas_por_bloque]
+
+def _abrir_texto(destino):
+    if isinstance(destino, str):
+        return open(destino, 'w', encoding='utf-8-sig', newline=''), True
+    return io.TextIOWrapper(destino, encoding='utf-8-sig', newline=''), False
+
+@cronometrar()
+def escribir_csv(destino, bloques):
+    """Escribe bloques de DataFrames en un CSV sin juntarlos en memoria
+
+    destino es una ruta o un archivo binario (por ejemplo BytesIO). El
+    encabezado sale del primer bloque. Devuelve las filas escritas.
+    """
+    archivo, propio = _abrir_texto(destino)
+    filas = 0
+    try:
+        for bloque in bloques:
+            bloque.to_csv(archivo, index=False, header=filas == 0)
+            filas += len(bloque)
+    finally:
+        if propio:
+            archivo.close()
+        else:
+            archivo.flush()
+            archivo.detach()
+    return filas
+
+def _nombre_hoja(nombre, usados):
+    # Excel no acepta []:*?/\ en el nombre y lo limita a 31 caracteres
+    base = re.sub(r'[\[\]:*?/\\]', '-', str(nombre))[:31] or 'Hoja'
+    nombre, numero = base, 2
+    while nombre in usados:
+        sufijo = f' ({numero})'
+        nombre, numero = base[:31 - len(sufijo)] + sufijo, numero + 1
+    usados.add(nombre)
+    return nombre
+
+@cronometrar()
+def escribir_xlsx(destino, hojas):
+    """Escribe un libro Excel hoja por hoja con openpyxl en modo de solo escritura
+
+    hojas es un diccionario de nombre a iterable de bloques (DataFrames).
+    Las filas se vuelcan a disco a medida que llegan, así que la memoria no
+    depende del tamaño del libro; si una tabla pasa el máximo de filas de
+    Excel continúa en otra hoja. Devuelve las filas escritas por hoja.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("Para exportar a Excel instala openpyxl: pip install openpyxl")
+
+    libro = Workbook(write_only=True)
+    usados = set()
+    filas = {}
+    for nombre, bloques in hojas.items():
+        hoja = None
+        filas[nombre] = 0
+        for bloque in bloques:
+            # Con tipos de Python openpyxl escribe más rápido que con escalares de NumPy
+            for fila in zip(*(bloque[columna].tolist() for columna in bloque.columns)):
+                if hoja is None or en_hoja == FILAS_MAXIMAS_HOJA:
+                    hoja = libro.create_sheet(_nombre_hoja(nombre, usados))
+                    hoja.append([str(c) for c in bloque.columns])
+                    en_hoja = 0
+                hoja.append(fila)
+                en_hoja += 1
+            filas[nombre] += len(bloque)
+        if hoja is None:
+            libro.create_sheet(_nombre_hoja(nombre, usados))
+    libro.save(destino)
+    return filas
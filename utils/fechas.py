@@ -0,0 +1,66 @@
+import numpy as np
+
+CONVENCIONES = ('30/360', 'ACT/365', 'ACT/ACT')
+
+def _a_dias(fechas):
+    return np.asarray(fechas, dtype='datetime64[D]')
+
+def componentes(fechas):
+    """Devuelve año, mes y día de un arreglo de fechas"""
+    fechas = _a_dias(fechas)
+    meses = fechas.astype('datetime64[M]')
+    ano = meses.astype('datetime64[Y]').astype(int) + 1970
+    mes = meses.astype(int) % 12 + 1
+    dia = (fechas - meses).astype(int) + 1
+    return ano, mes, dia
+
+def sumar_meses(fechas, meses):
+    """Suma meses a cada fecha, ajustando al último día si el mes es más corto"""
+    fechas = _a_dias(fechas)
+    _, _, dia = componentes(fechas)
+    mes_destino = fechas.astype('datetime64[M]') + np.asarray(meses).astype('timedelta64[M]')
+    dias_mes = ((mes_destino + 1).astype('datetime64[D]') - mes_destino.astype('datetime64[D]')).astype(int)
+    return mes_destino.astype('datetime64[D]') + (np.minimum(dia, dias_mes) - 1).astype('timedelta64[D]')
+
+def _dias_del_ano(ano):
+    bisiesto = ((ano % 4 == 0) & (ano % 100 != 0)) | (ano % 400 == 0)
+    return np.where(bisiesto, 366, 365)
+
+def fraccion_ano(inicio, fin, convencion='30/360'):
+    """Fracción de año entre dos fechas según la convención de conteo de días"""
+    inicio = _a_dias(inicio)
+    fin = _a_dias(fin)
+    if convencion == '30/360':
+        a1, m1, d1 = componentes(inicio)
+        a2, m2, d2 = componentes(fin)
+        d1 = np.minimum(d1, 30)
+        d2 = np.where((d1 == 30) & (d2 == 31), 30, d2)
+        return ((a2 - a1) * 360 + (m2 - m1) * 30 + (d2 - d1)) / 360
+    if convencion == 'ACT/365':
+        return (fin - inicio).astype(int) / 365
+    if convencion == 'ACT/ACT':
+        a1, _, _ = componentes(inicio)
+        a2, _, _ = componentes(fin)
+        fin_a1 = (a1 + 1 - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+        inicio_a2 = (a2 - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+        return ((fin_a1 - inicio).astype(int) / _dias_del_ano(a1)
+                + (a2 - a1 - 1)
+                + (fin - inicio_a2).astype(int) / _dias_del_ano(a2))
+    raise ValueError(f"Convención desconocida; use una de: {', '.join(CONVENCIONES)}")
+
+def cupones_vecinos(fecha_liquidacion, fecha_vencimiento, periodos_anuales):
+    """Cupón anterior, próximo cupón y cupones restantes para cada bono a la fecha de liquidación"""
+    liquidacion = _a_dias(fecha_liquidacion)
+    vencimiento = _a_dias(fecha_vencimiento)
+    paso = (12 // np.asarray(periodos_anuales)).astype(int)
+    
+    a1, m1, _ = componentes(liquidacion)
+    a2, m2, _ = componentes(vencimiento)
+    estimado = ((a2 - a1) * 12 + (m2 - m1)) // paso
+    candidato = sumar_meses(vencimiento, -estimado * paso)
+    restantes = np.where(candidato > liquidacion, estimado + 1, estimado)
+    restantes = np.maximum(restantes, 0)
+    
+    proximo = sumar_meses(vencimiento, -(restantes - 1) * paso)
+    anterior = sumar_meses(vencimiento, -restantes * paso)
+    return anterior, proximo, restantes
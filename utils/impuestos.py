@@ -0,0 +1,62 @@
+import numpy as np
+
+# Tablas de impuesto: límite inferior de cada tramo y su tasa marginal
+TABLAS_IMPUESTO = {
+    'local': ([0], [0.05]),
+    'extranjera': ([0], [0.295]),
+}
+
+_tablas_indexadas = {}
+
+def _indexar_tabla(limites, tasas):
+    """Precalcula el impuesto acumulado al inicio de cada tramo"""
+    limites = np.asarray(limites, dtype=float)
+    tasas = np.asarray(tasas, dtype=float)
+    acumulado = np.concatenate(([0.0], np.cumsum(np.diff(limites) * tasas[:-1])))
+    return limites, tasas, acumulado
+
+def registrar_tabla(tipo_impuesto, limites, tasas):
+    """Agrega o reemplaza una tabla progresiva de impuesto"""
+    limites = np.asarray(limites, dtype=float)
+    tasas = np.asarray(tasas, dtype=float)
+    if limites.ndim != 1 or len(limites) == 0 or len(limites) != len(tasas) or limites[0] != 0:
+        raise ValueError("La tabla debe iniciar en 0 y tener una tasa por tramo")
+    if not np.all(np.diff(limites) > 0):
+        raise ValueError("Los límites de los tramos deben ser estrictamente crecientes")
+    TABLAS_IMPUESTO[tipo_impuesto] = (limites.tolist(), tasas.tolist())
+    _tablas_indexadas[tipo_impuesto] = _indexar_tabla(limites, tasas)
+
+for _tipo, (_limites, _tasas) in TABLAS_IMPUESTO.items():
+    _tablas_indexadas[_tipo] = _indexar_tabla(_limites, _tasas)
+
+def impuesto_por_tramos(base, tipo_impuesto):
+    """Aplica la tabla del tipo indicado a una o varias bases imponibles"""
+    base = np.maximum(np.asarray(base, dtype=float), 0)
+    if tipo_impuesto not in _tablas_indexadas:
+        return base * 0
+    limites, tasas, acumulado = _tablas_indexadas[tipo_impuesto]
+    tramo = np.searchsorted(limites, base, side='right') - 1
+    tramo = np.maximum(tramo, 0)
+    return acumulado[tramo] + (base - limites[tramo]) * tasas[tramo]
+
+def impuesto_mixto(ganancia, asignacion):
+    """Calcula el impuesto de una ganancia repartida entre varios tipos de inversión"""
+    ganancia = np.asarray(ganancia, dtype=float)
+    total = ganancia * 0
+    for tipo_impuesto, peso in asignacion.items():
+        total = total + impuesto_por_tramos(ganancia * peso, tipo_impuesto)
+    return total
+
+def tabla_combinada(asignacion):
+    """Tabla única (límites, tasas marginales, impuesto acumulado) sobre la ganancia total
+
+    Junta las tablas de la asignación: cada límite de un tipo se lleva a la
+    ganancia total dividiéndolo por su peso, y la tasa marginal de cada
+    tramo es la suma de las tasas de los tipos ponderadas por su peso.
+    """
+    partes = [(peso, *_tablas_indexadas[tipo][:2]) for tipo, peso in asignacion.items()
+              if tipo in _tablas_indexadas and peso > 0]
+    limites = np.unique(np.concatenate([[0.0]] + [l[1:] / peso for peso, l, _ in partes]))
+    tasas = sum((peso * t[np.searchsorted(l, limites * peso, side='right') - 1] for peso, l, t in partes),
+                np.zeros(len(limites)))
+    return limites, tasas, np.asarray(impuesto_mixto(limites, asignacion), dtype=float)
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+import numpy as np
+from utils.calculos import (tasa_equivalente, factores_crecimiento, saldos_cartera,
+                            armar_resultado_cartera)
+from utils.perfilado import cronometrar
+
+MAX_TASAS_EN_CACHE = 32
+
+class EvaluadorCartera:
+    """Recalcula la cartera reutilizando lo ya calculado cuando cambia un solo parámetro"""
+    
+    def __init__(self):
+        self._factores = OrderedDict()
+        self._params = None
+        self._saldo = np.empty(0)
+    
+    def _factores_para(self, tasa_periodica, periodos_totales):
+        """Devuelve los factores de crecimiento de la tasa, extendiéndolos si hace falta"""
+        factor = self._factores.pop(tasa_periodica, None)
+        if factor is None:
+            factor = factores_crecimiento(tasa_periodica, periodos_totales)
+        elif len(factor) < periodos_totales:
+            extra = factores_crecimiento(tasa_periodica, periodos_totales - len(factor))
+            factor = np.concatenate((factor, factor[-1] * extra))
+        self._factores[tasa_periodica] = factor
+        if len(self._factores) > MAX_TASAS_EN_CACHE:
+            self._factores.popitem(last=False)
+        return factor
+    
+    def saldos(self, monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales):
+        """Devuelve periodos, saldo previo y saldo de cada periodo"""
+        tasa_periodica = tasa_equivalente(tea, periodos_anuales)
+        params = (monto_inicial, aporte_periodico, tasa_periodica)
+        factor = self._factores_para(tasa_periodica, periodos_totales)
+        
+        if params == self._params and len(self._saldo) > 0:
+            faltantes = periodos_totales - len(self._saldo)
+            if faltantes > 0:
+                # Se continúa desde el último saldo en caché
+                _, _, extension = saldos_cartera(
+                    self._saldo[-1], aporte_periodico, tasa_periodica, faltantes, factor
+                )
+                self._saldo = np.concatenate((self._saldo, extension))
+            saldo = self._saldo[:periodos_totales]
+        else:
+            _, _, saldo = saldos_cartera(
+                monto_inicial, aporte_periodico, tasa_periodica, periodos_totales, factor
+            )
+            self._params = params
+            self._saldo = saldo
+        
+        periodos = np.arange(1, periodos_totales + 1)
+        saldo_previo = np.concatenate(([monto_inicial], saldo))[:-1]
+        return periodos, saldo_previo, saldo
+    
+    @cronometrar('utils.incremental.EvaluadorCartera.calcular')
+    def calcular(self, monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales):
+        """Equivalente a calcular_crecimiento_cartera usando la caché"""
+        periodos, saldo_previo, saldo = self.saldos(
+            monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales
+        )
+        return armar_resultado_cartera(
+            monto_inicial, aporte_periodico, tasa_equivalente(tea, periodos_anuales),
+            periodos, saldo_previo, saldo
+        )
+
+def verificar_contra_recalculo(evaluador, monto_inicial, aporte_periodico, tea,
+                               periodos_totales, periodos_anuales, tolerancia=1e-9):
+    """Compara los saldos incrementales con el recálculo completo"""
+    _, _, saldo_incremental = evaluador.saldos(
+        monto_inicial, aporte_periodico, tea, periodos_totales, periodos_anuales
+    )
+    _, _, saldo_completo = saldos_cartera(
+        monto_inicial, aporte_periodico, tasa_equivalente(tea, periodos_anuales), periodos_totales
+    )
+    return bool(np.allclose(saldo_incremental, saldo_completo, rtol=tolerancia))
@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+import numpy as np
+from utils.calculos import tasa_equivalente
+
+@lru_cache(maxsize=64)
+def _deflactores(inflacion, periodos_totales, periodos_anuales, periodo_inicial):
+    periodos = np.arange(periodo_inicial + periodos_totales)
+    anos = np.minimum(periodos // periodos_anuales, len(inflacion) - 1)
+    tasa = tasa_equivalente(np.asarray(inflacion)[anos], periodos_anuales)
+    deflactor = 1 / np.cumprod(1 + tasa)[periodo_inicial:]
+    deflactor.flags.writeable = False
+    return deflactor
+
+def deflactores(inflacion, periodos_totales, periodos_anuales, periodo_inicial=0):
+    """Factores para pasar montos nominales de cada periodo a dólares de hoy
+
+    inflacion es una tasa anual en % o un vector con la tasa de cada año
+    (el último valor se repite). El resultado se guarda en caché y es de
+    solo lectura para poder compartirlo entre módulos.
+    """
+    inflacion = tuple(float(x) for x in np.atleast_1d(inflacion))
+    return _deflactores(inflacion, int(periodos_totales), int(periodos_anuales), int(periodo_inicial))
+
+def expresar_en_reales(df, columnas, deflactor):
+    """Devuelve una copia del DataFrame con las columnas indicadas en términos reales"""
+    df = df.copy()
+    df[columnas] = df[columnas].mul(deflactor[:len(df)], axis=0).round(2)
+    return df
+
+def aportes_reales(monto_inicial, aportes, deflactor):
+    """Aportes acumulados en dólares de hoy: cada aporte se deflacta al periodo en que se hizo"""
+    aportes = np.asarray(aportes, dtype=float)
+    return monto_inicial + np.cumsum(aportes * deflactor[:len(aportes)])
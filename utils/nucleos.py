@@ -0,0 +1,124 @@
+import os
+import time
+
+import numpy as np
+
+# Numba es opcional: si no está instalado (o CALC_NUMBA=0) se usan las versiones en NumPy
+try:
+    if os.environ.get('CALC_NUMBA', '1') == '0':
+        raise ImportError
+    import numba
+except ImportError:
+    numba = None
+
+BACKEND = 'numba' if numba is not None else 'numpy'
+REDONDEO_CODIGO = {'mitad_par': 0, 'mitad_arriba': 1, 'truncar': 2}
+# Escala de la tasa fija en utils.dinero; como constantes globales Numba las compila como literales
+ESCALA_TASA = 10**12
+PARTE_TASA = 10**6
+
+def _compilar(funcion):
+    # cache=True guarda lo compilado junto al módulo (o en NUMBA_CACHE_DIR) para no recompilar al arrancar
+    if numba is None:
+        return funcion
+    return numba.njit(cache=True, nogil=True, error_model='numpy')(funcion)
+
+def _saldos_retencion_bucle(monto, aporte, tasa, periodos_totales, limites, tasas, acumulado):
+    interes = np.empty(periodos_totales)
+    retencion = np.empty(periodos_totales)
+    saldo = np.empty(periodos_totales)
+    tramo = 0
+    ganancia = 0.0
+    impuesto = acumulado[0]
+    actual = monto
+    for k in range(periodos_totales):
+        monto_interes = actual * tasa
+        ganancia += monto_interes
+        while tramo + 1 < limites.shape[0] and ganancia >= limites[tramo + 1]:
+            tramo += 1
+        # Se retiene lo que sube el impuesto sobre la ganancia acumulada, aunque el periodo cruce de tramo
+        nuevo = acumulado[tramo] + (ganancia - limites[tramo]) * tasas[tramo]
+        interes[k] = monto_interes
+        retencion[k] = nuevo - impuesto
+        impuesto = nuevo
+        actual += monto_interes - retencion[k] + aporte
+        saldo[k] = actual
+    return interes, retencion, saldo
+
+def _saldos_centavos_bucle(monto, aporte, tasa, periodos_totales, redondeo):
+    carteras = monto.shape[0]
+    interes = np.empty((carteras, periodos_totales), dtype=np.int64)
+    saldo = np.empty((carteras, periodos_totales), dtype=np.int64)
+    paso = ESCALA_TASA // PARTE_TASA
+    for i in range(carteras):
+        actual = monto[i]
+        for k in range(periodos_totales):
+            producto = (actual // PARTE_TASA) * tasa[i]
+            numerador = (producto % paso) * PARTE_TASA + (actual % PARTE_TASA) * tasa[i]
+            cociente = numerador // ESCALA_TASA + producto // paso
+            resto = numerador % ESCALA_TASA
+            if redondeo == 0:
+                if 2 * resto > ESCALA_TASA or (2 * resto == ESCALA_TASA and cociente % 2 == 1):
+                    cociente += 1
+            elif redondeo == 1:
+                if 2 * resto >= ESCALA_TASA:
+                    cociente += 1
+            interes[i, k] = cociente
+            actual += cociente + aporte[i]
+            saldo[i, k] = actual
+    return interes, saldo
+
+_saldos_retencion_compilado = _compilar(_saldos_retencion_bucle)
+_saldos_centavos_compilado = _compilar(_saldos_centavos_bucle)
+
+def saldos_retencion(monto, aporte, tasa, periodos_totales, limites, tasas, acumulado):
+    """Versión compilada de utils.calculos.saldos_cartera_retencion; solo disponible con Numba"""
+    return _saldos_retencion_compilado(float(monto), float(aporte), float(tasa), periodos_totales,
+                                       np.ascontiguousarray(limites, dtype=np.float64),
+                                       np.ascontiguousarray(tasas, dtype=np.float64),
+                                       np.ascontiguousarray(acumulado, dtype=np.float64))
+
+def saldos_centavos(monto, aporte, tasa, periodos_totales, redondeo):
+    """Versión compilada de utils.dinero.saldos_cartera_centavos; solo disponible con Numba"""
+    return _saldos_centavos_compilado(np.ascontiguousarray(monto), np.ascontiguousarray(aporte),
+                                      np.ascontiguousarray(tasa), periodos_totales, REDONDEO_CODIGO[redondeo])
+
+def comparar_backends(carteras=10_000, periodos_totales=960, repeticiones=3):
+    """Mide cada núcleo con NumPy y, si está instalado, con Numba (sin contar la compilación)
+
+    La retención se calcula una cartera por llamada, así que se mide sobre
+    las primeras 100 carteras.
+    """
+    from utils.calculos import saldos_cartera_retencion
+    from utils.dinero import saldos_cartera_centavos
+    from utils.impuestos import tabla_combinada
+    rng = np.random.default_rng(0)
+    tasas = rng.uniform(0, 0.01, carteras)
+    aportes = rng.uniform(0, 500, carteras)
+    saldo_inicial = rng.uniform(0, 50_000, carteras)
+    centavos = (np.rint(saldo_inicial * 100).astype(np.int64), np.rint(aportes * 100).astype(np.int64),
+                np.rint(tasas * ESCALA_TASA).astype(np.int64))
+    tabla = tabla_combinada({'local': 0.5, 'extranjera': 0.5})
+
+    def retencion(backend):
+        for monto, aporte, tasa in zip(saldo_inicial[:100], aportes[:100], tasas[:100]):
+            saldos_cartera_retencion(monto, aporte, tasa, periodos_totales, *tabla, backend=backend)
+
+    backends = ['numpy'] + (['numba'] if numba is not None else [])
+    tiempos = {}
+    for backend in backends:
+        for nombre, nucleo in (('saldos_centavos', lambda: saldos_cartera_centavos(*centavos, periodos_totales,
+                                                                                   backend=backend)),
+                               ('saldos_retencion', lambda: retencion(backend))):
+            nucleo()
+            mejor = float('inf')
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                nucleo()
+                mejor = min(mejor, time.perf_counter() - inicio)
+            tiempos[f'{nombre}_{backend}'] = round(mejor * 1000, 1)
+    return tiempos
+
+if __name__ == '__main__':
+    print(f"Backend: {BACKEND}")
+    print(comparar_backends())
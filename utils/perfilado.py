@@ -0,0 +1,106 @@
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+
+MAX_TRAMOS = 2000
+ACTIVO_POR_DEFECTO = os.environ.get('CALC_PERFILADO', '') == '1'
+
+# Cada sesión de Streamlit corre en su propio hilo, así que el estado de la medición
+# vive en el contexto de ese hilo y una sesión no la enciende o apaga para las demás
+_activo = ContextVar('perfilado_activo', default=ACTIVO_POR_DEFECTO)
+_sesion = ContextVar('perfilado_sesion', default=None)
+_tramos = deque(maxlen=MAX_TRAMOS)
+_numeros = itertools.count(1)
+
+def activar(activo=True, sesion=None):
+    """Enciende o apaga la medición de tiempos en la ejecución actual
+
+    sesion identifica a quién pertenecen los tramos que se registren desde aquí.
+    """
+    _activo.set(activo)
+    _sesion.set(sesion)
+
+def esta_activo():
+    return _activo.get()
+
+class _Tramo:
+    """Mide la duración de una etapa y la registra al salir"""
+    __slots__ = ('etapa', 'inicio')
+    
+    def __init__(self, etapa):
+        self.etapa = etapa
+    
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        duracion = time.perf_counter() - self.inicio
+        _tramos.append({
+            'numero': next(_numeros),
+            'sesion': _sesion.get(),
+            'etapa': self.etapa,
+            'inicio': time.time() - duracion,
+            'duracion_ms': round(duracion * 1000, 3),
+            'pid': os.getpid(),
+            'hilo': threading.get_ident()
+        })
+        return False
+
+class _TramoNulo:
+    """Tramo vacío que se usa cuando la medición está apagada"""
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+_NULO = _TramoNulo()
+
+def medir(etapa):
+    """Context manager que registra el tiempo de la etapa si la medición está activa"""
+    return _Tramo(etapa) if _activo.get() else _NULO
+
+def cronometrar(etapa=None):
+    """Decorador que registra el tiempo de cada llamada a la función"""
+    def decorador(funcion):
+        nombre = etapa or f"{funcion.__module__}.{funcion.__name__}"
+        
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activo.get():
+                return funcion(*args, **kwargs)
+            with _Tramo(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+def tramos_recientes(desde=0.0, solo_sesion_actual=False):
+    """Devuelve los tramos registrados a partir del instante indicado"""
+    sesion = _sesion.get()
+    return [t for t in list(_tramos)
+            if t['inicio'] >= desde and (not solo_sesion_actual or t['sesion'] == sesion)]
+
+def limpiar():
+    _tramos.clear()
+
+def exportar_jsonl(ruta='perfilado.jsonl', tramos=None, desde=0):
+    """Agrega al archivo JSON-lines los tramos de la sesión actual posteriores al número desde
+
+    Devuelve cuántos se escribieron y el número del último, que se pasa como
+    desde en la siguiente exportación para no repetir tramos.
+    """
+    if tramos is None:
+        sesion = _sesion.get()
+        tramos = [t for t in list(_tramos) if t['sesion'] == sesion and t['numero'] > desde]
+    with open(ruta, 'a', encoding='utf-8') as archivo:
+        for tramo in tramos:
+            archivo.write(json.dumps(tramo, ensure_ascii=False) + '\n')
+    return len(tramos), max((t['numero'] for t in tramos), default=desde)
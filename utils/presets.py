@@ -0,0 +1,80 @@
+from functools import lru_cache
+
+import pandas as pd
+from utils.calculos import (PERIODOS_ANUALES, calcular_crecimiento_cartera, calcular_impuesto,
+                            calcular_pension_mensual)
+
+ESCENARIO_INICIO = 'inicio'
+
+# Escenarios con los que suele empezar la gente; el de Inicio es el ejemplo de la portada
+PRESETS = {
+    ESCENARIO_INICIO: {
+        'nombre': 'Ejemplo de Inicio (30 → 65 años)',
+        'monto_inicial': 5000.0, 'aporte_periodico': 500.0, 'tea': 8.0, 'frecuencia': 'Mensual', 'anos': 35,
+        'tipo_impuesto': 'extranjera', 'tea_retiro': 5.0, 'anos_retiro': 20
+    },
+    'conservador': {
+        'nombre': 'Conservador',
+        'monto_inicial': 1000.0, 'aporte_periodico': 100.0, 'tea': 5.0, 'frecuencia': 'Mensual', 'anos': 30,
+        'tipo_impuesto': 'local', 'tea_retiro': 4.0, 'anos_retiro': 20
+    },
+    'moderado': {
+        'nombre': 'Moderado',
+        'monto_inicial': 1000.0, 'aporte_periodico': 100.0, 'tea': 8.0, 'frecuencia': 'Mensual', 'anos': 30,
+        'tipo_impuesto': 'extranjera', 'tea_retiro': 5.0, 'anos_retiro': 20
+    },
+    'agresivo': {
+        'nombre': 'Agresivo',
+        'monto_inicial': 1000.0, 'aporte_periodico': 100.0, 'tea': 12.0, 'frecuencia': 'Mensual', 'anos': 30,
+        'tipo_impuesto': 'extranjera', 'tea_retiro': 6.0, 'anos_retiro': 20
+    },
+    'tardio': {
+        'nombre': 'Inicio tardío (45 → 65 años)',
+        'monto_inicial': 20000.0, 'aporte_periodico': 1000.0, 'tea': 8.0, 'frecuencia': 'Mensual', 'anos': 20,
+        'tipo_impuesto': 'extranjera', 'tea_retiro': 5.0, 'anos_retiro': 20
+    },
+}
+
+def clave_parametros(monto_inicial, aporte_periodico, tea, frecuencia, anos):
+    """Clave con la que se busca un escenario por sus datos de cartera"""
+    return (float(monto_inicial), float(aporte_periodico), float(tea), frecuencia, int(anos))
+
+@lru_cache(maxsize=1)
+def catalogo():
+    """Calcula una sola vez por proceso los resultados de todos los escenarios
+
+    Devuelve (resumen, cronogramas, indice): un DataFrame con una fila por
+    escenario, el cronograma de cartera de cada uno y un diccionario de
+    clave_parametros a escenario. Los objetos son compartidos; no modificarlos.
+    """
+    filas = {}
+    cronogramas = {}
+    indice = {}
+    for clave, p in PRESETS.items():
+        periodos_anuales = PERIODOS_ANUALES[p['frecuencia']]
+        df, saldo_final, total_aportes = calcular_crecimiento_cartera(
+            p['monto_inicial'], p['aporte_periodico'], p['tea'], p['anos'] * periodos_anuales, periodos_anuales
+        )
+        impuesto = calcular_impuesto(saldo_final - total_aportes, p['tipo_impuesto'])
+        capital_neto = saldo_final - impuesto
+        filas[clave] = {
+            'Escenario': p['nombre'],
+            'Saldo Final': saldo_final,
+            'Total Aportes': total_aportes,
+            'Impuesto': impuesto,
+            'Capital Neto': capital_neto,
+            'Pensión Mensual': float(calcular_pension_mensual(capital_neto, p['tea_retiro'], p['anos_retiro']))
+        }
+        cronogramas[clave] = df
+        indice[clave_parametros(p['monto_inicial'], p['aporte_periodico'], p['tea'], p['frecuencia'], p['anos'])] = clave
+    return pd.DataFrame.from_dict(filas, orient='index'), cronogramas, indice
+
+def buscar_preset(monto_inicial, aporte_periodico, tea, frecuencia, anos):
+    """Devuelve la clave del escenario con esos datos de cartera, o None"""
+    return catalogo()[2].get(clave_parametros(monto_inicial, aporte_periodico, tea, frecuencia, anos))
+
+def resultado_cartera(clave):
+    """Devuelve (df, saldo_final, total_aportes) precalculados de un escenario"""
+    resumen, cronogramas, _ = catalogo()
+    fila = resumen.loc[clave]
+    return cronogramas[clave].copy(), float(fila['Saldo Final']), float(fila['Total Aportes'])
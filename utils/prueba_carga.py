@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+RUTA_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+INTERVALO_MUESTREO = 0.2
+
+def _rss_mb():
+    """RSS actual en Linux, el máximo que informa resource en otros Unix, o None (Windows)"""
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, AttributeError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS lo informa en bytes; Linux y los BSD en KiB
+    return maximo / 2**20 if sys.platform == 'darwin' else maximo / 1024
+
+def _cpu_segundos():
+    # Tiempo de CPU de usuario y sistema de todo el proceso, en cualquier sistema
+    return time.process_time()
+
+class Monitor(threading.Thread):
+    """Muestrea CPU y RSS del proceso mientras dura la prueba"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.muestras = []
+        self._detener = threading.Event()
+
+    def run(self):
+        anterior_t, anterior_cpu = time.perf_counter(), _cpu_segundos()
+        while not self._detener.wait(INTERVALO_MUESTREO):
+            t, cpu = time.perf_counter(), _cpu_segundos()
+            rss = _rss_mb()
+            self.muestras.append({'cpu_pct': round((cpu - anterior_cpu) / (t - anterior_t) * 100, 1),
+                                  'rss_mb': round(rss, 1) if rss is not None else None})
+            anterior_t, anterior_cpu = t, cpu
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+
+def _boton(at, texto):
+    return next(b for b in at.button if texto in b.label)
+
+def _numero(at, etiqueta):
+    return next(n for n in at.number_input if n.label.startswith(etiqueta))
+
+def _interacciones(at, rng, variar):
+    """Recorrido de una sesión: (nombre, acción) en el orden en que lo haría un usuario"""
+    def pagina(nombre):
+        return lambda: at.sidebar.radio[0].set_value(nombre).run()
+
+    def calcular_cartera():
+        if variar:
+            _numero(at, "TEA").set_value(round(rng.uniform(1, 15), 2))
+            _numero(at, "Aporte Periódico").set_value(float(rng.randint(50, 2000)))
+        _boton(at, "Calcular Proyección").click().run()
+
+    def calcular_jubilacion():
+        if variar:
+            _numero(at, "TEA durante Retiro").set_value(round(rng.uniform(1, 10), 2))
+        _boton(at, "Calcular Jubilación").click().run()
+
+    def calcular_bono():
+        if variar:
+            _numero(at, "TEA").set_value(round(rng.uniform(1, 15), 2))
+        _boton(at, "Calcular Valor del Bono").click().run()
+
+    return [
+        ('inicio', at.run),
+        ('pagina_cartera', pagina("📊 Cartera")),
+        ('calcular_cartera', calcular_cartera),
+        ('pagina_jubilacion', pagina("💰 Jubilación")),
+        ('calcular_jubilacion', calcular_jubilacion),
+        ('pagina_bonos', pagina("📈 Bonos")),
+        ('calcular_bono', calcular_bono),
+        ('pagina_exportar', pagina("📄 Exportar")),
+        ('generar_pdf', lambda: _boton(at, "Generar y Descargar PDF").click().run()),
+    ]
+
+def _sesion(numero, repeticiones, variar, registros, tiempo_limite):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(numero)
+    for repeticion in range(repeticiones):
+        at = AppTest.from_file(RUTA_APP, default_timeout=tiempo_limite)
+        for nombre, accion in _interacciones(at, rng, variar):
+            inicio = time.perf_counter()
+            try:
+                accion()
+                error = str(at.exception[0].message) if at.exception else None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            registros.append({
+                'sesion': numero,
+                'repeticion': repeticion,
+                'interaccion': nombre,
+                'ms': round((time.perf_counter() - inicio) * 1000, 1),
+                'error': error
+            })
+            if error:
+                break
+
+def resumir(registros, muestras, duracion):
+    """Arma el reporte: percentiles de latencia por interacción, CPU y memoria"""
+    interacciones = {}
+    for nombre in dict.fromkeys(r['interaccion'] for r in registros):
+        ms = np.array([r['ms'] for r in registros if r['interaccion'] == nombre])
+        interacciones[nombre] = {
+            'n': len(ms),
+            'errores': sum(1 for r in registros if r['interaccion'] == nombre and r['error']),
+            'p50_ms': round(float(np.percentile(ms, 50)), 1),
+            'p95_ms': round(float(np.percentile(ms, 95)), 1),
+            'p99_ms': round(float(np.percentile(ms, 99)), 1),
+            'max_ms': round(float(ms.max()), 1)
+        }
+    cpu = [m['cpu_pct'] for m in muestras] or [0.0]
+    rss = [m['rss_mb'] for m in muestras if m['rss_mb'] is not None]
+    if not rss and _rss_mb() is not None:
+        rss = [_rss_mb()]
+    return {
+        'duracion_s': round(duracion, 2),
+        'interacciones_por_s': round(len(registros) / duracion, 2) if duracion > 0 else 0.0,
+        'errores': [r for r in registros if r['error']][:20],
+        'cpu_promedio_pct': round(float(np.mean(cpu)), 1),
+        'cpu_maximo_pct': round(float(np.max(cpu)), 1),
+        'rss_maximo_mb': round(float(np.max(rss)), 1) if rss else None,
+        'rss_final_mb': round(float(rss[-1]), 1) if rss else None,
+        'por_interaccion': interacciones
+    }
+
+def ejecutar_prueba(sesiones=4, repeticiones=2, variar=True, tiempo_limite=120):
+    """Lanza las sesiones en hilos (como el servidor de Streamlit) y devuelve el reporte"""
+    from utils.calentamiento import calentar
+
+    calentar()
+    registros = []
+    monitor = Monitor()
+    hilos = [threading.Thread(target=_sesion, args=(i, repeticiones, variar, registros, tiempo_limite))
+             for i in range(sesiones)]
+    inicio = time.perf_counter()
+    monitor.start()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    monitor.detener()
+    reporte = resumir(registros, monitor.muestras, time.perf_counter() - inicio)
+    reporte['parametros'] = {
+        'sesiones': sesiones,
+        'repeticiones': repeticiones,
+        'variar': variar,
+        'CALC_CACHE': os.environ.get('CALC_CACHE', '0'),
+        'CALC_NUMBA': os.environ.get('CALC_NUMBA', '1')
+    }
+    return reporte
+
+def imprimir_reporte(reporte):
+    print(f"Sesiones: {reporte['parametros']['sesiones']} × {reporte['parametros']['repeticiones']} "
+          f"| {reporte['duracion_s']} s | {reporte['interacciones_por_s']} interacciones/s")
+    memoria = (f"RSS máx {reporte['rss_maximo_mb']} MB, final {reporte['rss_final_mb']} MB"
+               if reporte['rss_maximo_mb'] is not None else "RSS no disponible en este sistema")
+    print(f"CPU promedio {reporte['cpu_promedio_pct']}% (máx {reporte['cpu_maximo_pct']}%) | {memoria}")
+    print(f"{'Interacción':<22}{'n':>5}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+    for nombre, d in reporte['por_interaccion'].items():
+        print(f"{nombre:<22}{d['n']:>5}{d['errores']:>5}{d['p50_ms']:>10}{d['p95_ms']:>10}{d['p99_ms']:>10}{d['max_ms']:>10}")
+    for error in reporte['errores'][:5]:
+        print(f"⚠️ sesión {error['sesion']} en {error['interaccion']}: {error['error']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simula sesiones concurrentes de la calculadora")
+    parser.add_argument('--sesiones', type=int, default=4)
+    parser.add_argument('--repeticiones', type=int, default=2)
+    parser.add_argument('--sin-variar', action='store_true', help="Usa siempre los valores por defecto")
+    parser.add_argument('--salida', help="Ruta del reporte JSON")
+    args = parser.parse_args()
+
+    reporte = ejecutar_prueba(args.sesiones, args.repeticiones, not args.sin_variar)
+    imprimir_reporte(reporte)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, ensure_ascii=False, indent=2)
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+TEA_MAXIMA = 50
+ANOS_MAXIMOS = 80
+EDAD_MINIMA = 18
+EDAD_MAXIMA = 100
+
+# Códigos de error por fila (0 = válido)
+OK = 0
+VALOR_FALTANTE = 1
+MONTO_NEGATIVO = 2
+TEA_FUERA_DE_RANGO = 3
+PLAZO_NO_POSITIVO = 4
+PLAZO_EXCEDIDO = 5
+PLAZO_NO_ENTERO = 6
+EDAD_MENOR_A_MINIMA = 7
+JUBILACION_NO_POSTERIOR = 8
+JUBILACION_EXCEDIDA = 9
+VALOR_NO_PERMITIDO = 10
+
+MENSAJES = {
+    VALOR_FALTANTE: "{nombre} está vacío o no es numérico",
+    MONTO_NEGATIVO: "{nombre} no puede ser negativo",
+    TEA_FUERA_DE_RANGO: f"La TEA debe estar entre 0% y {TEA_MAXIMA}%",
+    PLAZO_NO_POSITIVO: "{nombre} debe ser mayor a 0",
+    PLAZO_EXCEDIDO: f"{{nombre}} no puede exceder {ANOS_MAXIMOS} años",
+    PLAZO_NO_ENTERO: "{nombre} debe ser un número entero de años",
+    EDAD_MENOR_A_MINIMA: f"La edad actual debe ser al menos {EDAD_MINIMA} años",
+    JUBILACION_NO_POSTERIOR: "La edad de jubilación debe ser mayor a la edad actual",
+    JUBILACION_EXCEDIDA: f"La edad de jubilación debe ser menor a {EDAD_MAXIMA} años",
+    VALOR_NO_PERMITIDO: "{nombre} no es un valor permitido",
+}
+
+def mensaje(codigo, nombre=""):
+    """Devuelve el mensaje legible de un código de error"""
+    return MENSAJES.get(int(codigo), "").format(nombre=nombre)
+
+def _numerico(valores):
+    if isinstance(valores, pd.Series):
+        return pd.to_numeric(valores, errors='coerce').to_numpy(dtype=float)
+    return np.asarray(valores, dtype=float)
+
+def _codificar(valores, reglas):
+    """Asigna a cada fila el código de la primera regla que incumple"""
+    valores = _numerico(valores)
+    condiciones = [np.isnan(valores)] + [falla(valores) for falla, _ in reglas]
+    codigos = [VALOR_FALTANTE] + [codigo for _, codigo in reglas]
+    return np.select(condiciones, codigos, OK).astype(np.int8)
+
+def codigos_monto(montos):
+    """Códigos de error de montos: deben ser no negativos"""
+    return _codificar(montos, [(lambda v: v < 0, MONTO_NEGATIVO)])
+
+def codigos_tea(teas):
+    """Códigos de error de TEAs: deben estar entre 0% y la TEA máxima"""
+    return _codificar(teas, [(lambda v: (v < 0) | (v > TEA_MAXIMA), TEA_FUERA_DE_RANGO)])
+
+def codigos_anos(anos, entero=False):
+    """Códigos de error de plazos en años"""
+    reglas = [(lambda v: v <= 0, PLAZO_NO_POSITIVO),
+              (lambda v: v > ANOS_MAXIMOS, PLAZO_EXCEDIDO)]
+    if entero:
+        reglas.append((lambda v: v != np.floor(v), PLAZO_NO_ENTERO))
+    return _codificar(anos, reglas)
+
+def codigos_edad(edad_actual, edad_jubilacion):
+    """Códigos de error de pares edad actual / edad de jubilación"""
+    actual = _numerico(edad_actual)
+    jubilacion = _numerico(edad_jubilacion)
+    condiciones = [np.isnan(actual) | np.isnan(jubilacion),
+                   actual < EDAD_MINIMA,
+                   jubilacion <= actual,
+                   jubilacion > EDAD_MAXIMA]
+    codigos = [VALOR_FALTANTE, EDAD_MENOR_A_MINIMA, JUBILACION_NO_POSTERIOR, JUBILACION_EXCEDIDA]
+    return np.select(condiciones, codigos, OK).astype(np.int8)
+
+def codigos_catalogo(valores, permitidos):
+    """Códigos de error de valores que deben pertenecer a un catálogo"""
+    valores = pd.Series(valores)
+    codigos = np.where(valores.isin(list(permitidos)).to_numpy(), OK, VALOR_NO_PERMITIDO)
+    return np.where(valores.isna().to_numpy(), VALOR_FALTANTE, codigos).astype(np.int8)
+
+REGLAS = {
+    'monto': codigos_monto,
+    'tea': codigos_tea,
+    'anos': codigos_anos,
+    'anos_entero': lambda v: codigos_anos(v, entero=True),
+}
+
+def validar_tabla(df, reglas):
+    """Valida las columnas indicadas de un DataFrame
+
+    reglas mapea cada columna al nombre de una regla de REGLAS o a una
+    función que recibe la columna y devuelve códigos. Devuelve la máscara
+    de filas válidas y un DataFrame con el código de cada columna.
+    """
+    codigos = pd.DataFrame(index=df.index)
+    for columna, regla in reglas.items():
+        funcion = REGLAS[regla] if isinstance(regla, str) else regla
+        codigos[columna] = funcion(df[columna]) if columna in df.columns \
+            else np.full(len(df), VALOR_FALTANTE, dtype=np.int8)
+    valido = (codigos.to_numpy() == OK).all(axis=1) if len(reglas) else np.ones(len(df), dtype=bool)
+    return valido, codigos
+
+def primer_error(codigos):
+    """Devuelve por fila la columna y el código del primer error encontrado"""
+    matriz = codigos.to_numpy()
+    con_error = matriz != OK
+    indice = con_error.argmax(axis=1)
+    filas = np.arange(len(matriz))
+    codigo = np.where(con_error.any(axis=1), matriz[filas, indice], OK)
+    columna = np.asarray(codigos.columns, dtype=object)[indice]
+    return np.where(codigo != OK, columna, ''), codigo